@@ -0,0 +1,14 @@
+"""Throughput benchmarks for the site generator.
+
+Run every pipeline stage over a synthetic corpus with:
+
+    python -m benchmarks --output results.json
+"""
+
+import os
+import sys
+
+# The generator's modules import each other as top-level modules
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
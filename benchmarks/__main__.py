@@ -0,0 +1,65 @@
+import argparse
+import json
+import sys
+
+from benchmarks.corpus import CorpusSpec
+from benchmarks.stages import run_stages
+
+
+def main() -> None:
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time each pipeline stage on a synthetic Markdown corpus",
+    )
+    parser.add_argument("--documents", type=int, default=defaults.documents)
+    parser.add_argument("--blocks", type=int, default=defaults.blocks_per_document)
+    parser.add_argument("--words", type=int, default=defaults.words_per_block)
+    parser.add_argument(
+        "--block-mix",
+        type=json.loads,
+        default=dict(defaults.block_mix),
+        help='Relative block type weights as JSON, e.g. \'{"paragraph": 1}\'',
+    )
+    parser.add_argument(
+        "--inline-density", type=float, default=defaults.inline_density
+    )
+    parser.add_argument("--links", type=int, default=defaults.links_per_block)
+    parser.add_argument("--images", type=int, default=defaults.images_per_block)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--duplicates",
+        type=float,
+        default=defaults.duplicate_blocks,
+        help="Fraction of blocks repeated from a pool shared by all documents",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--output", type=str, help="Write the JSON results here instead of stdout"
+    )
+    args = parser.parse_args()
+
+    spec = CorpusSpec(
+        documents=args.documents,
+        blocks_per_document=args.blocks,
+        words_per_block=args.words,
+        block_mix=args.block_mix,
+        inline_density=args.inline_density,
+        links_per_block=args.links,
+        images_per_block=args.images,
+        seed=args.seed,
+        duplicate_blocks=args.duplicates,
+    )
+    results = run_stages(spec, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        for name, stage in results["stages"].items():
+            print(f"{name:>28}: {stage['best_seconds'] * 1000:9.2f} ms")
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare the single-scan inline tokenizer with the five splitting passes
+it replaced on the paragraphs of a paragraph-heavy corpus.
+
+Usage: python -m benchmarks.bench_inline [--documents 50] [--repeat 5]
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, List
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+from markdown_operations import (
+    markdown_to_blocks,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import TextNode, TextNodeType
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+
+def split_pipeline(text: str) -> List[TextNode]:
+    """The five splitting passes text_to_textnodes used before, kept for
+    comparison."""
+
+    nodes = [TextNode(text, TextNodeType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextNodeType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextNodeType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextNodeType.CODE)
+    nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
+
+def measure(name: str, tokenize: Callable[[str], List[TextNode]], texts, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            tokenize(text)
+        timings.append(time.perf_counter() - start)
+    # Measured apart from the timing, as tracing slows allocation down.
+    # Transient memory is what the peak held beyond the returned tokens.
+    tracemalloc.start()
+    transient = 0
+    for text in texts:
+        tracemalloc.reset_peak()
+        tokens = tokenize(text)
+        current, peak = tracemalloc.get_traced_memory()
+        transient += peak - current
+        del tokens
+    tracemalloc.stop()
+    print(
+        f"{name:>18}: {min(timings) * 1000:8.2f} ms, "
+        f"{transient / len(texts):8.0f} transient bytes per paragraph"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    spec = CorpusSpec(documents=args.documents, block_mix={"paragraph": 1})
+    texts = [
+        block.replace("\n", " ")
+        for document in generate_corpus(spec)
+        for block in markdown_to_blocks(document)
+        if not block.startswith("# ")
+    ]
+    mismatches = sum(text_to_textnodes(text) != split_pipeline(text) for text in texts)
+    print(f"{len(texts)} paragraphs, {mismatches} with a different token stream")
+    measure("split passes", split_pipeline, texts, args.repeat)
+    measure("text_to_textnodes", text_to_textnodes, texts, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
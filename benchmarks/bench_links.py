@@ -0,0 +1,58 @@
+"""Time image and link splitting on a link-dense index page.
+
+Usage: python -m benchmarks.bench_links [--links 5000]
+"""
+
+import argparse
+import time
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+from markdown_operations import (
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import TextNode, TextNodeType
+
+
+def index_line(links: int) -> str:
+    """Build one paragraph holding the given number of links, with an
+    image after every tenth link."""
+
+    parts = []
+    for i in range(links):
+        parts.append(f"[Page {i}](/pages/{i})")
+        if i % 10 == 9:
+            parts.append(f"![Thumb {i}](/images/{i}.png)")
+    return " | ".join(parts)
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = index_line(args.links)
+    nodes = [TextNode(text, TextNodeType.TEXT)]
+    print(f"{args.links} links, {len(text)} characters")
+    for name, func, arg in (
+        ("split_nodes_image", split_nodes_image, nodes),
+        ("split_nodes_link", split_nodes_link, nodes),
+        ("text_to_textnodes", text_to_textnodes, text),
+    ):
+        seconds = best_of(args.repeat, func, arg)
+        print(f"{name:>20}: {seconds * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Report memory per node and construction time for node trees, with the
+slotted node classes and with the dict-based classes they replaced.
+
+Usage: python -m benchmarks.bench_nodes [--nodes 200000]
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Tuple
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+from leafnode import LeafNode
+from parentnode import ParentNode
+from textnode import TextNode, TextNodeType
+
+TEXTS = [f"word {i}" for i in range(100)]
+
+
+class DictTextNode:
+    """TextNode as it was before it had slots, kept for comparison."""
+
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    """HTMLNode as it was before it had slots, kept for comparison. Every
+    node allocated its own children list and props dict."""
+
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children if children is not None else []
+        self.props = props if props is not None else {}
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, value, tag=None, props={}):
+        super().__init__(tag=tag, value=value, children=[], props=props)
+
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, children, tag=None, props={}):
+        super().__init__(tag=tag, children=children, props=props)
+
+
+def build_textnodes(count: int, text_node=TextNode):
+    return [text_node(TEXTS[i % 100], TextNodeType.TEXT) for i in range(count)]
+
+
+def build_html_tree(count: int, leaf_node=LeafNode, parent_node=ParentNode):
+    """Build a div of paragraphs, each holding ten leaves, one of them a link."""
+
+    paragraphs = []
+    for start in range(0, count, 11):
+        leaves = [leaf_node(TEXTS[(start + i) % 100]) for i in range(9)]
+        leaves.append(leaf_node("link", "a", {"href": "/"}))
+        paragraphs.append(parent_node(leaves, "p"))
+    return parent_node(paragraphs, "div")
+
+
+def measure(builder, count: int) -> Tuple[float, float]:
+    """Return the bytes per node and the seconds builder takes to build
+    count nodes."""
+
+    start = time.perf_counter()
+    tree = builder(count)
+    seconds = time.perf_counter() - start
+    del tree
+    # Measured apart from the timing, as tracing slows allocation down
+    tracemalloc.start()
+    tree = builder(count)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return allocated / count, seconds
+
+
+def compare(name: str, before, after, count: int) -> None:
+    before_bytes, before_seconds = measure(before, count)
+    after_bytes, after_seconds = measure(after, count)
+    print(f"{name} ({count} nodes)")
+    for label, node_bytes, seconds in (
+        ("before", before_bytes, before_seconds),
+        ("after", after_bytes, after_seconds),
+    ):
+        print(
+            f"{label:>10}: {node_bytes:7.1f} bytes/node, "
+            f"{seconds * 1000:8.1f} ms to build"
+        )
+    print(
+        f"{'change':>10}: {after_bytes / before_bytes - 1:+7.1%} memory, "
+        f"{after_seconds / before_seconds - 1:+8.1%} time"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=200_000)
+    args = parser.parse_args()
+    compare(
+        "TextNode",
+        lambda count: build_textnodes(count, DictTextNode),
+        build_textnodes,
+        args.nodes,
+    )
+    compare(
+        "HTMLNode",
+        lambda count: build_html_tree(count, DictLeafNode, DictParentNode),
+        build_html_tree,
+        args.nodes,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare download throughput of a large static asset with sendfile and
+with Python-level copying.
+
+Usage: python -m benchmarks.bench_sendfile [--size-mb 100] [--downloads 5]
+"""
+
+import argparse
+import http.client
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler
+
+from benchmarks.load_test import REPO_DIR
+
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+
+import server  # noqa: E402
+
+
+def download_seconds(port: int, path: str, downloads: int) -> float:
+    """Return the best time to download path over a fresh connection."""
+
+    timings = []
+    for _ in range(downloads):
+        connection = http.client.HTTPConnection("localhost", port)
+        start = time.perf_counter()
+        connection.request("GET", path)
+        response = connection.getresponse()
+        while response.read(1 << 20):
+            pass
+        timings.append(time.perf_counter() - start)
+        connection.close()
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--downloads", type=int, default=5)
+    args = parser.parse_args()
+
+    class CopyHandler(server.KeepAliveHandler):
+        """KeepAliveHandler with the body copied through Python."""
+
+        def copyfile(self, source, outputfile):
+            if self._body_range is None:
+                return super().copyfile(source, outputfile)
+            source.seek(self._body_range[0])
+            shutil.copyfileobj(source, outputfile)
+
+    handlers = {
+        "SimpleHTTPRequestHandler": SimpleHTTPRequestHandler,
+        "copyfileobj": CopyHandler,
+        "sendfile": server.KeepAliveHandler,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "asset.bin"), "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1 << 20))
+        print(f"{args.size_mb} MB asset, best of {args.downloads} downloads")
+        for name, handler in handlers.items():
+            quiet = type(name, (handler,), {"log_message": lambda self, *a: None})
+            httpd = server.PooledHTTPServer(
+                ("localhost", 0),
+                lambda *a, quiet=quiet: quiet(*a, directory=directory),
+            )
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            seconds = download_seconds(
+                httpd.server_address[1], "/asset.bin", args.downloads
+            )
+            httpd.shutdown()
+            httpd.server_close()
+            print(f"{name:>25}: {args.size_mb / seconds:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
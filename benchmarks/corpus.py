@@ -0,0 +1,153 @@
+"""Deterministic synthetic Markdown corpus for benchmarks."""
+
+import os
+import random
+from typing import List, Mapping, NamedTuple
+
+DEFAULT_BLOCK_MIX: Mapping[str, float] = {
+    "heading": 0.15,
+    "paragraph": 0.5,
+    "code": 0.1,
+    "quote": 0.05,
+    "unordered_list": 0.1,
+    "ordered_list": 0.1,
+}
+
+# Number of distinct blocks that duplicated blocks are drawn from
+DUPLICATE_POOL_SIZE = 20
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog middle earth ring shire hobbit "
+    "elf dwarf wizard tower river mountain forest road journey fellowship"
+).split()
+
+
+class CorpusSpec(NamedTuple):
+    """The shape of a synthetic corpus. The same spec always produces the
+    same documents."""
+
+    documents: int = 50
+    blocks_per_document: int = 40
+    words_per_block: int = 60
+    # Relative weight of each block type
+    block_mix: Mapping[str, float] = DEFAULT_BLOCK_MIX
+    # Fraction of words wrapped in bold, italic or code markup
+    inline_density: float = 0.1
+    links_per_block: int = 2
+    images_per_block: int = 0
+    seed: int = 0
+    # Fraction of blocks copied from a small pool shared by every document,
+    # like notices and code samples repeated across a real site
+    duplicate_blocks: float = 0.0
+
+
+def generate_corpus(spec: CorpusSpec) -> List[str]:
+    """Return spec.documents Markdown documents."""
+
+    rng = random.Random(spec.seed)
+    # Drawn from a separate generator so that specs without duplicates
+    # produce the same documents as before duplicates were supported
+    shared_rng = random.Random(f"{spec.seed}-shared")
+    shared = [_block(spec, shared_rng) for _ in range(DUPLICATE_POOL_SIZE)]
+    return [_document(spec, rng, index, shared) for index in range(spec.documents)]
+
+
+def write_corpus(spec: CorpusSpec, directory: str) -> List[str]:
+    """Write the corpus as a content tree of index.md files under
+    directory and return their paths."""
+
+    paths = []
+    for index, document in enumerate(generate_corpus(spec)):
+        page_directory = os.path.join(directory, f"page{index}")
+        os.makedirs(page_directory, exist_ok=True)
+        path = os.path.join(page_directory, "index.md")
+        with open(path, "w") as f:
+            f.write(document)
+        paths.append(path)
+    return paths
+
+
+def _document(
+    spec: CorpusSpec, rng: random.Random, index: int, shared: List[str]
+) -> str:
+    blocks = [f"# Document {index}"]
+    for _ in range(spec.blocks_per_document - 1):
+        if spec.duplicate_blocks and rng.random() < spec.duplicate_blocks:
+            blocks.append(rng.choice(shared))
+        else:
+            blocks.append(_block(spec, rng))
+    return "\n\n".join(blocks) + "\n"
+
+
+def _block(spec: CorpusSpec, rng: random.Random) -> str:
+    block_types = list(spec.block_mix)
+    weights = [spec.block_mix[name] for name in block_types]
+    block_type = rng.choices(block_types, weights)[0]
+    return _BLOCK_BUILDERS[block_type](spec, rng)
+
+
+def _inline_text(spec: CorpusSpec, rng: random.Random, words: int) -> str:
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        if rng.random() < spec.inline_density:
+            word = rng.choice(("**{}**", "*{}*", "`{}`")).format(word)
+        parts.append(word)
+    for _ in range(spec.links_per_block):
+        word = rng.choice(WORDS)
+        parts.insert(rng.randrange(len(parts) + 1), f"[{word}](/{word}/{rng.randrange(1000)})")
+    for _ in range(spec.images_per_block):
+        word = rng.choice(WORDS)
+        parts.insert(rng.randrange(len(parts) + 1), f"![{word}](/images/{word}.png)")
+    return " ".join(parts)
+
+
+def _heading(spec: CorpusSpec, rng: random.Random) -> str:
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+    return "#" * rng.randint(2, 6) + " " + words
+
+
+def _paragraph(spec: CorpusSpec, rng: random.Random) -> str:
+    text = _inline_text(spec, rng, spec.words_per_block)
+    # Wrap long paragraphs over several lines, as hand-written Markdown does
+    words = text.split(" ")
+    return "\n".join(" ".join(words[i : i + 12]) for i in range(0, len(words), 12))
+
+
+def _code(spec: CorpusSpec, rng: random.Random) -> str:
+    lines = [
+        f"{rng.choice(WORDS)} = {rng.choice(WORDS)}({rng.randrange(100)})"
+        for _ in range(max(1, spec.words_per_block // 6))
+    ]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def _quote(spec: CorpusSpec, rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(spec.words_per_block)]
+    return "\n".join("> " + " ".join(words[i : i + 12]) for i in range(0, len(words), 12))
+
+
+def _items(spec: CorpusSpec, rng: random.Random) -> List[str]:
+    count = rng.randint(2, 8)
+    per_item = max(1, spec.words_per_block // count)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(per_item)) for _ in range(count)
+    ]
+
+
+def _unordered_list(spec: CorpusSpec, rng: random.Random) -> str:
+    return "\n".join(f"- {item}" for item in _items(spec, rng))
+
+
+def _ordered_list(spec: CorpusSpec, rng: random.Random) -> str:
+    return "\n".join(f"{i}. {item}" for i, item in enumerate(_items(spec, rng), 1))
+
+
+_BLOCK_BUILDERS = {
+    "heading": _heading,
+    "paragraph": _paragraph,
+    "code": _code,
+    "quote": _quote,
+    "unordered_list": _unordered_list,
+    "ordered_list": _ordered_list,
+}
@@ -0,0 +1,144 @@
+"""Load-test server.py with keep-alive clients and report throughput and
+latency.
+
+Usage: python -m benchmarks.load_test [--clients 16] [--seconds 5]
+
+Without --url, a public/ tree is generated from the synthetic corpus into
+a temporary directory and served by server.py on a background thread.
+"""
+
+import argparse
+import contextlib
+import http.client
+import importlib.util
+import io
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+from typing import List, Tuple
+
+import benchmarks
+from build_profile import percentile
+from page_generator import generate_pages_recursive
+
+from benchmarks.corpus import CorpusSpec, write_corpus
+
+REPO_DIR = os.path.dirname(benchmarks.SRC_DIR)
+
+
+def _load_server_module():
+    spec = importlib.util.spec_from_file_location(
+        "server", os.path.join(REPO_DIR, "server.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_site(directory: str, documents: int) -> List[str]:
+    """Generate a site under directory/public and return its page URLs."""
+
+    content = os.path.join(directory, "content")
+    public = os.path.join(directory, "public")
+    os.makedirs(public)
+    write_corpus(CorpusSpec(documents=documents), content)
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_pages_recursive(
+            content, os.path.join(REPO_DIR, "template.html"), public
+        )
+    return [f"/page{i}/index.html" for i in range(documents)]
+
+
+def client(
+    host: str, port: int, paths: List[str], deadline: float, latencies: List[float]
+) -> Tuple[int, int]:
+    """Request paths in turn over one keep-alive connection until
+    deadline. Returns the number of responses and errors."""
+
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    responses = errors = 0
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+        responses += 1
+    connection.close()
+    return responses, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", type=str, help="Base URL of a running server")
+    parser.add_argument("--paths", nargs="*", default=["/"])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.url:
+            url = urllib.parse.urlsplit(args.url)
+            host, port, paths = url.hostname, url.port or 80, args.paths
+        else:
+            paths = build_site(directory, args.documents)
+            server = _load_server_module()
+            handler = type(
+                "QuietHandler",
+                (server.KeepAliveHandler,),
+                {"log_message": lambda self, *a: None},
+            )
+            httpd = server.PooledHTTPServer(
+                ("localhost", 0),
+                lambda *a: handler(*a, directory=os.path.join(directory, "public")),
+                args.workers,
+            )
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            host, port = "localhost", httpd.server_address[1]
+
+        latencies: List[float] = []
+        results: List[Tuple[int, int]] = []
+        deadline = time.perf_counter() + args.seconds
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    client(host, port, paths, deadline, latencies)
+                )
+            )
+            for _ in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        if not args.url:
+            httpd.shutdown()
+            httpd.server_close()
+
+    latencies.sort()
+    responses = sum(result[0] for result in results)
+    errors = sum(result[1] for result in results)
+    print(f"{args.clients} clients, {elapsed:.1f} s")
+    print(f"requests/s: {responses / elapsed:10.1f}")
+    print(f"       p50: {percentile(latencies, 0.50) * 1000:10.2f} ms")
+    print(f"       p99: {percentile(latencies, 0.99) * 1000:10.2f} ms")
+    print(f"    errors: {errors:10d}")
+
+
+if __name__ == "__main__":
+    main()
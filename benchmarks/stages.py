@@ -0,0 +1,122 @@
+"""Time each stage of the page pipeline on its own."""
+
+import io
+import os
+import platform
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import benchmarks  # noqa: F401  (puts src/ on sys.path)
+from block_cache import BlockCache
+from markdown_operations import (
+    block_to_block_type,
+    markdown_to_blocks,
+    markdown_to_html,
+    markdown_to_html_node,
+    text_to_textnodes,
+)
+from template import Template
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(benchmarks.SRC_DIR), "template.html")
+
+
+def _time(func: Callable[[], object], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_stages(spec: CorpusSpec, repeat: int = 5) -> Dict:
+    """Run every stage over the corpus described by spec and return the
+    results as a JSON-serializable dict.
+
+    Each stage gets the output of the previous stages precomputed, so its
+    timing covers only its own work."""
+
+    documents = generate_corpus(spec)
+    blocks = [block for document in documents for block in markdown_to_blocks(document)]
+    inline_texts = [
+        block.replace("\n", " ")
+        for block in blocks
+        if block_to_block_type(block).value == "paragraph"
+    ]
+    nodes = [markdown_to_html_node(document) for document in documents]
+    pages = [node.to_html() for node in nodes]
+    with open(TEMPLATE_PATH) as f:
+        template = Template(f.read())
+    source_bytes = sum(len(document.encode()) for document in documents)
+    output_bytes = sum(len(page.encode()) for page in pages)
+
+    def block_cache_stage() -> None:
+        cache = BlockCache()
+        for document in documents:
+            markdown_to_html_node(document, cache).to_html()
+
+    def template_stage() -> None:
+        for page in pages:
+            template.render_to(io.StringIO(), {"Title": "Title", "Content": page})
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f"page{i}.html") for i in range(len(pages))]
+
+        def file_io_stage() -> None:
+            for path, page in zip(paths, pages):
+                with open(path, "w") as f:
+                    f.write(page)
+                with open(path) as f:
+                    f.read()
+
+        stages = {
+            "markdown_to_blocks": (
+                lambda: [markdown_to_blocks(document) for document in documents],
+                len(documents),
+            ),
+            "block_to_block_type": (
+                lambda: [block_to_block_type(block) for block in blocks],
+                len(blocks),
+            ),
+            "text_to_textnodes": (
+                lambda: [text_to_textnodes(text) for text in inline_texts],
+                len(inline_texts),
+            ),
+            "markdown_to_html_node": (
+                lambda: [markdown_to_html_node(document) for document in documents],
+                len(documents),
+            ),
+            "to_html": (lambda: [node.to_html() for node in nodes], len(nodes)),
+            "tree_to_html": (
+                lambda: [markdown_to_html_node(document).to_html() for document in documents],
+                len(documents),
+            ),
+            "tree_to_html_block_cache": (block_cache_stage, len(documents)),
+            "markdown_to_html": (
+                lambda: [markdown_to_html(document) for document in documents],
+                len(documents),
+            ),
+            "template": (template_stage, len(pages)),
+            "file_io": (file_io_stage, len(pages)),
+        }
+        results = {}
+        for name, (func, items) in stages.items():
+            timings = _time(func, repeat)
+            best = min(timings)
+            results[name] = {
+                "items": items,
+                "best_seconds": best,
+                "timings": timings,
+                "items_per_second": items / best if best else None,
+            }
+
+    return {
+        "python": platform.python_version(),
+        "spec": spec._asdict(),
+        "source_bytes": source_bytes,
+        "output_bytes": output_bytes,
+        "stages": results,
+    }
@@ -1,20 +1,494 @@
 import os
 import argparse
+import email.utils
+import hashlib
+import io
+import selectors
+import signal
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from http.server import HTTPServer, SimpleHTTPRequestHandler
+from typing import List, NamedTuple, Optional, Tuple, cast
+
+
+# Precompressed siblings written by the build; the smallest accepted one wins
+PRECOMPRESSED_SUFFIXES = (("xz", ".xz"), ("gzip", ".gz"))
+
+# Returned for a Range that lies entirely past the end of the file
+_UNSATISFIABLE = (-1, -1)
+
+
+class CachedFile(NamedTuple):
+    body: bytes
+    etag: str
+    mtime: float
+    # Identifies the version of the file on disk the body was read from
+    stat_key: tuple
+
+
+class FileCache:
+    """A bounded, thread-safe LRU of file contents with precomputed strong
+    ETags.
+
+    Every lookup stats the file and re-reads it if its inode, size or
+    mtime changed, so files rewritten by a build are never served stale.
+    Files larger than max_file_bytes are not cached."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_file_bytes=1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[CachedFile]:
+        stat = os.stat(path)
+        stat_key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.stat_key == stat_key:
+                self._entries.move_to_end(path)
+                return entry
+        if stat.st_size > self.max_file_bytes:
+            return None
+        with open(path, "rb") as f:
+            body = f.read()
+        entry = CachedFile(
+            body,
+            f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+            stat.st_mtime,
+            stat_key,
+        )
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[path] = entry
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+        return entry
+
+
+class PooledHTTPServer(HTTPServer):
+    """An HTTP server that answers requests on a bounded pool of worker
+    threads, so one slow client can't block the others.
+
+    A worker only holds a connection while a request is waiting on it.
+    Idle keep-alive connections are parked in a selector watched by a
+    single thread, which hands each one back to the pool when its next
+    request arrives and closes it after idle_timeout seconds."""
+
+    def __init__(
+        self,
+        server_address,
+        handler_class,
+        max_workers=32,
+        cache_bytes=64 * 1024 * 1024,
+        idle_timeout=15.0,
+    ):
+        super().__init__(server_address, handler_class)
+        self.file_cache = FileCache(cache_bytes) if cache_bytes > 0 else None
+        self.idle_timeout = idle_timeout
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="http-worker"
+        )
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        # Connections waiting to be parked, and whether the server closed
+        self._to_park: List[Tuple[socket.socket, tuple]] = []
+        self._closing = False
+        self._waker, self._wakeup = socket.socketpair()
+        self._waker.setblocking(False)
+        self._wakeup.setblocking(False)
+        self._parking = threading.Thread(
+            target=self._watch_idle, name="http-idle", daemon=True
+        )
+        self._parking.start()
+
+    def process_request(self, request, client_address):
+        with self._connections_lock:
+            self._connections.add(request)
+        # Even the first request waits outside the pool
+        self.park(request, client_address)
+
+    def park(self, request, client_address):
+        """Wait for the next request on a connection without holding a
+        worker."""
+
+        with self._connections_lock:
+            if not self._closing:
+                self._to_park.append((request, client_address))
+                request = None
+        if request is not None:
+            self.shutdown_request(request)
+            return
+        try:
+            self._waker.send(b"\0")
+        except BlockingIOError:
+            pass  # A wakeup is already pending
+
+    def _serve_connection(self, request, client_address):
+        """Answer the requests that have arrived on a connection, then
+        park it again or close it."""
+
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            return
+        if getattr(handler, "close_connection", True):
+            self.shutdown_request(request)
+        else:
+            self.park(request, client_address)
+
+    def _watch_idle(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self._wakeup, selectors.EVENT_READ)
+        # Parked connections with the time they are closed at, in the
+        # order they were parked, so the first one expires first
+        deadlines: "OrderedDict[socket.socket, float]" = OrderedDict()
+        while True:
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, next(iter(deadlines.values())) - time.monotonic())
+            for key, _ in selector.select(timeout):
+                if key.fileobj is self._wakeup:
+                    try:
+                        while self._wakeup.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                selector.unregister(key.fileobj)
+                del deadlines[key.fileobj]
+                self._pool.submit(self._serve_connection, key.fileobj, key.data)
+            with self._connections_lock:
+                closing, parked, self._to_park = self._closing, self._to_park, []
+            deadline = time.monotonic() + self.idle_timeout
+            for request, client_address in parked:
+                selector.register(request, selectors.EVENT_READ, client_address)
+                deadlines[request] = deadline
+            now = time.monotonic()
+            while deadlines and (closing or next(iter(deadlines.values())) <= now):
+                request, _ = deadlines.popitem(last=False)
+                selector.unregister(request)
+                self.shutdown_request(request)
+            if closing:
+                selector.close()
+                return
+
+    def shutdown_request(self, request):
+        with self._connections_lock:
+            self._connections.discard(request)
+        super().shutdown_request(request)
+
+    def server_close(self):
+        """Stop accepting connections, close idle keep-alive connections
+        and let in-flight responses finish."""
+
+        super().server_close()
+        with self._connections_lock:
+            closed, self._closing = self._closing, True
+        if closed:
+            return
+        self._waker.send(b"\0")
+        self._parking.join()
+        with self._connections_lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                # Ends the wait for a pipelined request without cutting
+                # off a response that is still being written
+                connection.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        self._pool.shutdown(wait=True)
+        self._waker.close()
+        self._wakeup.close()
+
+
+class KeepAliveHandler(SimpleHTTPRequestHandler):
+    """Serves files over HTTP/1.1, keeping connections open between
+    requests."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # body waits on the client's delayed ACK on a reused connection
+    disable_nagle_algorithm = True
+    # Bounds how long a worker waits on a client that is slow to send a
+    # request or to read a response
+    timeout = 15
+
+    def handle(self):
+        """Answer the requests that have already arrived, then return,
+        leaving close_connection False if the connection is to be kept
+        open. PooledHTTPServer waits for the next request outside the
+        worker; other servers get the base class's blocking loop."""
+
+        if not isinstance(self.server, PooledHTTPServer):
+            return super().handle()
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self._request_waiting():
+            self.handle_one_request()
+
+    def _request_waiting(self) -> bool:
+        """Whether the client already sent more, such as a pipelined
+        request, without waiting for it."""
+
+        self.connection.setblocking(False)
+        try:
+            return bool(cast(io.BufferedReader, self.rfile).peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def send_head(self):
+        """Serve a regular file with validators and Range support.
+
+        Small files come from the server's FileCache. Larger ones are
+        opened here and their body is sent by copyfile with sendfile.
+        Conditional requests are answered with 304 Not Modified, and a
+        single byte range with 206 Partial Content. Directory redirects,
+        listings and missing files are left to the base class."""
+
+        self._body_range = None
+        path = self._file_path()
+        if path is None:
+            return super().send_head()
+        encoding, body_path = self._choose_encoding(path)
+        cache = getattr(self.server, "file_cache", None)
+        f = None
+        try:
+            entry = cache.get(body_path) if cache is not None else None
+            if entry is not None:
+                etag, mtime, size = entry.etag, entry.mtime, len(entry.body)
+            else:
+                f = open(body_path, "rb")
+                stat = os.fstat(f.fileno())
+                etag = f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+                mtime, size = stat.st_mtime, stat.st_size
+        except OSError:
+            return super().send_head()
+
+        last_modified = self.date_time_string(mtime)
+        if self._not_modified(etag, mtime):
+            if f is not None:
+                f.close()
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            if self._has_precompressed(path):
+                self.send_header("Vary", "Accept-Encoding")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            return None
+        byte_range = self._requested_range(size, etag, last_modified)
+        if byte_range == _UNSATISFIABLE:
+            if f is not None:
+                f.close()
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        if byte_range is not None:
+            start, length = byte_range[0], byte_range[1] - byte_range[0] + 1
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header(
+                "Content-Range", f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+            )
+        else:
+            start, length = 0, size
+            self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", self.guess_type(path))
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        if self._has_precompressed(path):
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        # Let browsers keep the page, but revalidate it on every use
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if f is None:
+            return io.BytesIO(entry.body[start : start + length])
+        self._body_range = (start, length)
+        return f
+
+    def copyfile(self, source, outputfile):
+        """Send the body of a file opened by send_head with sendfile(),
+        which copies it to the socket inside the kernel. socket.sendfile
+        falls back to plain sends where sendfile isn't available."""
+
+        if self._body_range is None:
+            return super().copyfile(source, outputfile)
+        offset, count = self._body_range
+        if count:
+            self.connection.sendfile(source, offset, count)
+
+    def _choose_encoding(self, path: str) -> Tuple[Optional[str], str]:
+        """Pick the smallest precompressed sibling of path that the
+        client accepts.
+
+        Returns the content coding, or None for the file itself, and the
+        path to read the body from. Siblings are only used if they carry
+        the source's mtime, as the build sets it, so a stale sibling is
+        never served. Nothing is compressed per request."""
+
+        accepted = self._accepted_encodings()
+        if not accepted:
+            return None, path
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None, path
+        best: Tuple[Optional[str], str] = (None, path)
+        best_size = None
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            if encoding not in accepted:
+                continue
+            try:
+                stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            if stat.st_mtime_ns == mtime_ns and (
+                best_size is None or stat.st_size < best_size
+            ):
+                best, best_size = (encoding, path + suffix), stat.st_size
+        return best
+
+    def _accepted_encodings(self) -> set:
+        """Return the content codings the client accepts with q > 0."""
+
+        accepted = set()
+        for part in self.headers.get("Accept-Encoding", "").split(","):
+            name, _, parameters = part.partition(";")
+            name = name.strip().lower()
+            quality = parameters.strip()
+            if quality.startswith("q="):
+                try:
+                    if float(quality[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            if name == "*":
+                accepted.add("gzip")
+            elif name:
+                accepted.add(name)
+        return accepted
+
+    @staticmethod
+    def _has_precompressed(path: str) -> bool:
+        return any(
+            os.path.exists(path + suffix) for _, suffix in PRECOMPRESSED_SUFFIXES
+        )
+
+    def _file_path(self) -> Optional[str]:
+        """Return the file a GET or HEAD would serve, or None if it is
+        not a regular file this handler serves itself."""
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].split("#", 1)[0].endswith("/"):
+                return None  # The base class redirects to add the slash
+            for index in ("index.html", "index.htm"):
+                if os.path.isfile(os.path.join(path, index)):
+                    return os.path.join(path, index)
+            return None  # Directory listing
+        if path.endswith("/") or not os.path.isfile(path):
+            return None
+        return path
+
+    def _not_modified(self, etag: str, mtime: float) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            # If-None-Match uses weak comparison, so W/ prefixes are ignored
+            return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return int(mtime) <= since.timestamp()
+
+    def _requested_range(
+        self, size: int, etag: str, last_modified: str
+    ) -> Optional[Tuple[int, int]]:
+        """Return the inclusive (first, last) byte range asked for, None
+        to send the whole file, or _UNSATISFIABLE.
+
+        Only a single range is supported; requests for several ranges get
+        the whole file, which HTTP allows."""
+
+        header = self.headers.get("Range")
+        if header is None or not header.startswith("bytes="):
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range.strip() not in (etag, last_modified):
+            return None  # The client's partial copy is out of date
+        first_text, dash, last_text = header[len("bytes=") :].strip().partition("-")
+        # int() would also take signs, spaces and underscores
+        texts = [text for text in (first_text, last_text) if text]
+        if not dash or not all(text.isascii() and text.isdigit() for text in texts):
+            return None
+        if not first_text:
+            if not last_text:
+                return None
+            suffix = int(last_text)
+            if suffix == 0 or size == 0:
+                return _UNSATISFIABLE
+            return max(0, size - suffix), size - 1
+        first = int(first_text)
+        last = int(last_text) if last_text else size - 1
+        if first >= size:
+            return _UNSATISFIABLE
+        if last < first:
+            return None
+        return first, min(last, size - 1)
 
 
 def run(
-    server_class=HTTPServer,
-    handler_class=SimpleHTTPRequestHandler,
+    server_class=PooledHTTPServer,
+    handler_class=KeepAliveHandler,
     port=8888,
     directory=None,
+    workers=32,
+    cache_bytes=64 * 1024 * 1024,
 ):
     if directory:  # Change the current working directory if directory is specified
         os.chdir(directory)
     server_address = ("", port)
-    httpd = server_class(server_address, handler_class)
-    print(f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
-    httpd.serve_forever()
+    httpd = server_class(server_address, handler_class, workers, cache_bytes)
+
+    def shutdown(signum, frame):
+        print("\nTermination signal received. Stopping server...")
+        # shutdown() blocks until serve_forever returns, so call it elsewhere
+        threading.Thread(target=httpd.shutdown).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    print(
+        f"Serving HTTP on http://localhost:{port} from directory '{directory}' "
+        f"with {workers} workers..."
+    )
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
 
 
 if __name__ == "__main__":
@@ -23,9 +497,25 @@ if __name__ == "__main__":
         "--dir", type=str, help="Directory to serve files from", default="."
     )
     parser.add_argument("--port", type=int, help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Maximum number of requests served at once",
+        default=32,
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        help="Megabytes of file contents kept in memory, 0 to disable",
+        default=64,
+    )
     args = parser.parse_args()
-
     try:
-        run(port=args.port, directory=args.dir)
+        run(
+            port=args.port,
+            directory=args.dir,
+            workers=args.workers,
+            cache_bytes=args.cache_mb * 1024 * 1024,
+        )
     except KeyboardInterrupt:
         print("\nKeyboard interrupt received. Stopping server...")
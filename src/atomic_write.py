@@ -0,0 +1,139 @@
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, List, Optional
+
+# Text is encoded and compared in chunks of about this many characters
+_BUFFER_SIZE = 1 << 16
+# Read once, as os.umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class AtomicWriter:
+    """A text stream that replaces the file at path on commit, unless the
+    file already holds exactly the same bytes, so unchanged outputs keep
+    their mtime.
+
+    The UTF-8 bytes written are compared with the file's contents as they
+    arrive. Only once they differ is a temporary file created next to
+    path, which is renamed over it on commit, so a reader never sees a
+    partly written file and an unchanged file is never written. Closing
+    without committing discards what was written.
+
+    The size and SHA-256 digest of the bytes written are kept, so the
+    build manifest doesn't have to read the output again."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._pending: List[str] = []
+        self._pending_size = 0
+        self._existing: Optional[BinaryIO]
+        try:
+            self._existing = open(path, "rb")
+        except FileNotFoundError:
+            self._existing = None
+        self._temp: Optional[BinaryIO] = None
+        self._temp_path: Optional[str] = None
+
+    def write(self, text: str) -> int:
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= _BUFFER_SIZE:
+            self._flush()
+        return len(text)
+
+    def write_bytes(self, data: bytes) -> None:
+        self._flush()
+        self._compare(data)
+
+    def hexdigest(self) -> str:
+        """Return the SHA-256 hex digest of everything written."""
+
+        self._flush()
+        return self._digest.hexdigest()
+
+    def commit(self) -> bool:
+        """Replace the file with what was written if it differs, and
+        return whether it did."""
+
+        self._flush()
+        if self._temp is None and (self._existing is None or self._existing.read(1)):
+            # The old file is longer, or there was none and nothing was written
+            self._temp = self._start_temp(self.size)
+        self._close_existing()
+        if self._temp is None or self._temp_path is None:
+            return False
+        self._temp.close()
+        os.replace(self._temp_path, self.path)
+        self._temp = self._temp_path = None
+        return True
+
+    def close(self) -> None:
+        self._close_existing()
+        if self._temp is not None and self._temp_path is not None:
+            self._temp.close()
+            os.remove(self._temp_path)
+            self._temp = self._temp_path = None
+
+    def __enter__(self) -> "AtomicWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _flush(self) -> None:
+        if self._pending:
+            data = "".join(self._pending).encode()
+            self._pending, self._pending_size = [], 0
+            self._compare(data)
+
+    def _compare(self, data: bytes) -> None:
+        self.size += len(data)
+        self._digest.update(data)
+        if self._temp is None:
+            if self._existing is not None and self._existing.read(len(data)) == data:
+                return
+            self._temp = self._start_temp(self.size - len(data))
+        self._temp.write(data)
+
+    def _start_temp(self, matched: int) -> BinaryIO:
+        """Create the temporary file, starting with the matched bytes
+        the old file has in common with the new one."""
+
+        directory, name = os.path.split(self.path)
+        fd, self._temp_path = tempfile.mkstemp(
+            prefix=f".{name}.", suffix=".tmp", dir=directory or "."
+        )
+        # mkstemp creates files only the owner can read
+        os.fchmod(fd, 0o666 & ~_UMASK)
+        temp = os.fdopen(fd, "wb")
+        if matched and self._existing is not None:
+            self._existing.seek(0)
+            while matched:
+                chunk = self._existing.read(min(matched, _BUFFER_SIZE))
+                if not chunk:
+                    break
+                temp.write(chunk)
+                matched -= len(chunk)
+        return temp
+
+    def _close_existing(self) -> None:
+        if self._existing is not None:
+            self._existing.close()
+            self._existing = None
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """Write data to path unless the file already holds exactly those
+    bytes, so unchanged outputs keep their mtime. Returns whether the file
+    was written.
+
+    The data goes to a temporary file that is renamed over path, so a
+    reader never sees a partly written file."""
+
+    with AtomicWriter(path) as writer:
+        writer.write_bytes(data)
+        return writer.commit()
@@ -0,0 +1,74 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from fragmentnode import FragmentNode
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+class BlockCache:
+    """A bounded LRU memo of rendered Markdown blocks, keyed by a hash of
+    each block's type and text, with hit and miss counts.
+
+    Pages often repeat whole blocks, such as notices, code samples and
+    link lists, so a repeated block is converted and rendered only once.
+
+    Passing a BlockCache to a worker process gives that worker its own
+    cache, which then lasts for every page the worker renders, rather
+    than a copy that is thrown away after one page."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, FragmentNode]" = OrderedDict()
+
+    def __reduce__(self):
+        return (process_block_cache, (self.max_entries,))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(block: str, block_type: str) -> bytes:
+        digest = hashlib.blake2b(block_type.encode(), digest_size=16)
+        digest.update(b"\0")
+        digest.update(block.encode())
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[FragmentNode]:
+        """Return the cached node for key, or None on a miss."""
+
+        node = self._entries.get(key)
+        if node is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return node
+
+    def put(self, key: bytes, node: FragmentNode) -> None:
+        """Store node under key, evicting the least recently used entry
+        if the cache is full."""
+
+        self._entries[key] = node
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+
+_process_caches: Dict[int, BlockCache] = {}
+
+
+def process_block_cache(max_entries: int = DEFAULT_MAX_ENTRIES) -> BlockCache:
+    """Return this process's block cache of the given size, creating it
+    on first use."""
+
+    cache = _process_caches.get(max_entries)
+    if cache is None:
+        cache = _process_caches[max_entries] = BlockCache(max_entries)
+    return cache
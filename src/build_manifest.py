@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from atomic_write import AtomicWriter
+
+# Bump whenever a change to the generator alters the HTML it produces, so
+# that every page is rebuilt on the next run.
+GENERATOR_VERSION = "2"
+DEFAULT_MANIFEST_PATH = ".build-manifest.json"
+
+
+def hash_file(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SourceVersion(NamedTuple):
+    """The hash, size and mtime of a source file as a build read it."""
+
+    hash: str
+    size: int
+    mtime_ns: int
+
+
+class BuildManifest:
+    """A persistent record of the inputs that produced each output file.
+
+    Each output path maps to the source it was built from, the kind of
+    output ("page" or "asset"), the hash, size and mtime of that source,
+    and the hash of the output itself. Size and mtime are used as a cheap
+    first check so an unchanged tree is not re-hashed on every build.
+
+    Output hashes are compared with those of the previous build to tell
+    which outputs were added, changed or removed; see changes.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_MANIFEST_PATH,
+        template_hash: Optional[str] = None,
+        generator_version: Optional[str] = GENERATOR_VERSION,
+        outputs: Optional[Dict[str, Dict]] = None,
+    ) -> None:
+        self.path = path
+        self.template_hash = template_hash
+        self.generator_version = generator_version
+        self.outputs: Dict[str, Dict] = outputs if outputs is not None else {}
+        self._seen: Set[str] = set()
+        # Output hashes as loaded, kept even if the records are replaced,
+        # and what has happened to each output since
+        self._loaded_hashes: Dict[str, Optional[str]] = {
+            dest: record.get("output_hash") for dest, record in self.outputs.items()
+        }
+        self._changes: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MANIFEST_PATH) -> "BuildManifest":
+        """Read a manifest from disk, or start an empty one if it is
+        missing or unreadable."""
+
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        return cls(
+            path,
+            template_hash=data.get("template_hash"),
+            generator_version=data.get("generator_version"),
+            outputs=data.get("outputs", {}),
+        )
+
+    def save(self) -> None:
+        """Atomically write the manifest back to disk."""
+
+        data = {
+            "generator_version": GENERATOR_VERSION,
+            "template_hash": self.template_hash,
+            "outputs": self.outputs,
+        }
+        with AtomicWriter(self.path) as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+            f.commit()
+
+    def use_template(self, template_path: str) -> None:
+        """Record the template for this build. Every page is rebuilt if
+        the template or the generator version changed.
+
+        The page records are kept, without their source's hash, size and
+        mtime, so that pages whose source is gone are still removed by
+        remove_stale_outputs."""
+
+        template_hash = hash_file(template_path)
+        if (
+            template_hash != self.template_hash
+            or self.generator_version != GENERATOR_VERSION
+        ):
+            for record in self.outputs.values():
+                if record["kind"] == "page":
+                    record.update(hash=None, size=None, mtime_ns=None)
+        self.template_hash = template_hash
+        self.generator_version = GENERATOR_VERSION
+
+    def needs_build(self, source_path: str, dest_path: str, kind: str = "page") -> bool:
+        """Return whether dest_path has to be rebuilt from source_path.
+
+        Marks dest_path as part of the current build, so it is not
+        removed by remove_stale_outputs."""
+
+        self._seen.add(dest_path)
+        record = self.outputs.get(dest_path)
+        if (
+            record is None
+            or record["source"] != source_path
+            or record["kind"] != kind
+            or not os.path.exists(dest_path)
+        ):
+            return True
+        stat = os.stat(source_path)
+        if record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            return False
+        if hash_file(source_path) != record["hash"]:
+            return True
+        # Touched but unchanged; remember the new mtime to skip hashing next time
+        record["size"] = stat.st_size
+        record["mtime_ns"] = stat.st_mtime_ns
+        return False
+
+    def record(
+        self,
+        source_path: str,
+        dest_path: str,
+        kind: str = "page",
+        output_hash: Optional[str] = None,
+        source: Optional[SourceVersion] = None,
+    ) -> None:
+        """Remember that dest_path was built from source_path.
+
+        source is the version of source_path the output was built from,
+        if the caller read it; otherwise source_path is read now, which
+        is wrong if it changed since. output_hash is the hash of
+        dest_path, if the caller knows it. An asset is a copy of its
+        source, so it has the source's hash; only otherwise is dest_path
+        read and hashed."""
+
+        if source is None:
+            stat = os.stat(source_path)
+            source = SourceVersion(
+                hash_file(source_path), stat.st_size, stat.st_mtime_ns
+            )
+        self._seen.add(dest_path)
+        if output_hash is None:
+            output_hash = source.hash if kind == "asset" else hash_file(dest_path)
+        self.outputs[dest_path] = {
+            "source": source_path,
+            "kind": kind,
+            "hash": source.hash,
+            "size": source.size,
+            "mtime_ns": source.mtime_ns,
+            "output_hash": output_hash,
+        }
+        if dest_path not in self._loaded_hashes:
+            self._changes[dest_path] = "added"
+        elif self._loaded_hashes[dest_path] != output_hash:
+            self._changes[dest_path] = "changed"
+        else:
+            self._changes.pop(dest_path, None)
+
+    def remove_stale_outputs(self) -> List[str]:
+        """Delete outputs whose sources were not seen during this build
+        and forget them. Returns the removed output paths."""
+
+        stale = [dest for dest in self.outputs if dest not in self._seen]
+        for dest in stale:
+            self.remove_output(dest)
+        return stale
+
+    def remove_output(self, dest_path: str) -> None:
+        """Delete an output whose source is gone and forget it."""
+
+        if os.path.exists(dest_path):
+            print(f"Removing stale output '{dest_path}'")
+            os.remove(dest_path)
+        self.outputs.pop(dest_path, None)
+        self._seen.discard(dest_path)
+        if dest_path in self._loaded_hashes:
+            self._changes[dest_path] = "removed"
+        else:
+            self._changes.pop(dest_path, None)
+
+    def changes(self) -> Dict[str, List[str]]:
+        """Return the outputs added, changed and removed since the
+        manifest was loaded, each list sorted."""
+
+        result: Dict[str, List[str]] = {"added": [], "changed": [], "removed": []}
+        for dest, change in sorted(self._changes.items()):
+            result[change].append(dest)
+        return result
@@ -0,0 +1,135 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from htmlnode import HTMLNode
+
+# Receives every profiling event: one "page" event per generated page and a
+# final "build" event holding the report.
+ProfileHook = Callable[[Dict], None]
+
+
+class StageTimer:
+    """Accumulates wall time per named stage of a single page.
+
+    current names the stage entered last, so a page that fails between
+    stages is blamed on the one before."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.current: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self.current = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = (
+                self.stages.get(name, 0.0) + time.perf_counter() - start
+            )
+
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+
+def count_nodes(node: HTMLNode) -> int:
+    """Return the number of nodes in the tree rooted at node."""
+
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        count += 1
+        stack.extend(current.children)
+    return count
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the value at fraction (0 to 1) of an ascending list, using
+    the nearest-rank method."""
+
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "total": sum(ordered),
+        "p50": percentile(ordered, 0.50),
+        "p90": percentile(ordered, 0.90),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+class BuildProfiler:
+    """Collects per-page statistics for a build and turns them into a
+    report.
+
+    Pages are recorded as dicts with source and destination paths,
+    per-stage seconds and output size, and a node count for pages
+    rendered through an HTMLNode tree. Every record is also
+    passed to each hook, so the same events can be sent to an external
+    metrics collector."""
+
+    def __init__(self, hooks: Optional[List[ProfileHook]] = None) -> None:
+        self.hooks: List[ProfileHook] = list(hooks) if hooks else []
+        self.pages: List[Dict] = []
+        self.started = time.perf_counter()
+
+    def add_hook(self, hook: ProfileHook) -> None:
+        self.hooks.append(hook)
+
+    def emit(self, event: Dict) -> None:
+        for hook in self.hooks:
+            hook(event)
+
+    def record_page(self, page: Dict) -> None:
+        self.pages.append(page)
+        self.emit({"event": "page", **page})
+
+    def report(self, slowest: int = 10) -> Dict:
+        """Return totals, percentiles and the slowest pages so far."""
+
+        stage_names = sorted({name for page in self.pages for name in page["stages"]})
+        report = {
+            "pages": len(self.pages),
+            "wall_seconds": time.perf_counter() - self.started,
+            "page_seconds": _summary([page["seconds"] for page in self.pages]),
+            "stages": {
+                name: _summary([page["stages"].get(name, 0.0) for page in self.pages])
+                for name in stage_names
+            },
+            "output_bytes": sum(page["output_bytes"] for page in self.pages),
+            "slowest": sorted(self.pages, key=lambda page: page["seconds"], reverse=True)[
+                :slowest
+            ],
+        }
+        if any("nodes" in page for page in self.pages):
+            report["nodes"] = sum(page.get("nodes", 0) for page in self.pages)
+        if any("block_hits" in page for page in self.pages):
+            hits = sum(page.get("block_hits", 0) for page in self.pages)
+            misses = sum(page.get("block_misses", 0) for page in self.pages)
+            report["block_cache"] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+        return report
+
+    def finish(self, report_path: Optional[str] = None, slowest: int = 10) -> Dict:
+        """Build the final report, send it to the hooks as a "build"
+        event and optionally write it to report_path as JSON."""
+
+        report = self.report(slowest)
+        self.emit({"event": "build", **report})
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(report, f, indent=2)
+        return report
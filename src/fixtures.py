@@ -0,0 +1,98 @@
+"""Helpers shared by the unit tests."""
+
+import math
+import os
+import tempfile
+import time
+import unittest
+from typing import Callable, List, Optional, Sequence, Union
+
+# Linear time gives an exponent of 1 and quadratic time one of 2
+MAX_LINEAR_EXPONENT = 1.5
+
+
+def _best_time(run: Callable[[], object], repeat: int, min_seconds: float) -> float:
+    """Return the best time per call of run, calling it in loops that
+    take at least min_seconds so that timer noise stays small.
+
+    Times are this thread's CPU time, which doesn't count the time other
+    processes had the CPU, so a busy machine doesn't skew them."""
+
+    start = time.thread_time()
+    run()
+    loops = max(1, math.ceil(min_seconds / max(time.thread_time() - start, 1e-9)))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.thread_time()
+        for _ in range(loops):
+            run()
+        best = min(best, (time.thread_time() - start) / loops)
+    return best
+
+
+def growth_exponent(
+    run: Callable[[object], object],
+    inputs: Sequence[object],
+    sizes: Sequence[int],
+    repeat: int = 3,
+    min_seconds: float = 2e-3,
+) -> float:
+    """Estimate k in time ~ size**k from the best times of run on inputs
+    of the given sizes, by a least squares fit of their logarithms."""
+
+    xs = [math.log(size) for size in sizes]
+    ys: List[float] = [
+        math.log(_best_time(lambda: run(value), repeat, min_seconds))
+        for value in inputs
+    ]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum(
+        (x - mean_x) ** 2 for x in xs
+    )
+
+
+def assert_linear(
+    testcase, run: Callable[[object], object], make_input: Callable[[int], object], size: int
+) -> None:
+    """Assert that run takes linear time on make_input(n), timed on a
+    series of inputs doubling from size.
+
+    One slow fit can be noise from a loaded machine, so the series is
+    timed again before failing, and only the better fit counts."""
+
+    sizes = [size * 2**doubling for doubling in range(4)]
+    inputs = [make_input(n) for n in sizes]
+    exponent = growth_exponent(run, inputs, sizes)
+    if exponent >= MAX_LINEAR_EXPONENT:
+        exponent = min(exponent, growth_exponent(run, inputs, sizes))
+    testcase.assertLess(exponent, MAX_LINEAR_EXPONENT)
+
+
+class TempDirTestCase(unittest.TestCase):
+    """A test case with a temporary directory, self.tmp, that is removed
+    after each test."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(
+        self, name: str, data: Union[str, bytes], mtime: Optional[float] = None
+    ) -> str:
+        """Write data to name, a path relative to the temporary directory,
+        creating its directories, and return the full path. With mtime,
+        the file's modification time is set to it."""
+
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def read(self, name: str) -> str:
+        """Return the text of name, relative to the temporary directory."""
+
+        with open(os.path.join(self.tmp.name, name)) as f:
+            return f.read()
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from htmlnode import HTMLNode, Writer
+
+
+class FragmentNode(HTMLNode):
+    """A node whose HTML is rendered once and then reused.
+
+    It keeps the tag, value, children and props of the node it wraps, so
+    the tree can still be walked, but writes the stored HTML instead of
+    rendering them again. The HTML is rendered the first time it is
+    needed, so that building a tree never renders and errors in the
+    document come in the same order as without a cache."""
+
+    __slots__ = ("node", "html")
+
+    def __init__(self, node: HTMLNode, html: Optional[str] = None) -> None:
+        super().__init__(node.tag, node.value, node.children, node.props)
+        self.node = node
+        self.html = html
+
+    def render_to(self, write: Writer) -> None:
+        if self.html is None:
+            self.html = self.node.to_html()
+        write(self.html)
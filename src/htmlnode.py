@@ -1,39 +1,54 @@
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional, Sequence
+
+Writer = Callable[[str], object]
+
+# Shared by every node without children or props, so leaves don't each
+# allocate an empty list and dict. Both are immutable.
+NO_CHILDREN: Sequence["HTMLNode"] = ()
+NO_PROPS: Mapping[str, str] = MappingProxyType({})
 
 
 class HTMLNode:
     """A generic representation of a block of HTML code."""
 
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: Optional[str] = None,
         value: Optional[str] = None,
-        children: Optional[List["HTMLNode"]] = None,
-        props: Optional[Dict[str, str]] = None
+        children: Optional[Sequence["HTMLNode"]] = None,
+        props: Optional[Mapping[str, str]] = None
     ) -> None:
         self.tag = tag
         self.value = value
-        self.children = children if children is not None else []
-        self.props = props if props is not None else {}
+        self.children = children if children else NO_CHILDREN
+        self.props = props if props else NO_PROPS
 
     def to_html(self) -> str:
         """Converts the given HTMLNode into an HTML-friendly string"""
+
+        parts: List[str] = []
+        self.render_to(parts.append)
+        return "".join(parts)
+
+    def render_to(self, write: Writer) -> None:
+        """Streams the HTML for this node to write, one piece at a time,
+        without building the whole string in memory."""
         raise NotImplementedError
 
     def props_to_html(self) -> str:
         """Converts a dictionary of HTML properties into an
         HTML-friendly string"""
 
-        result: str = ""
-        for key, value in self.props.items():
-            result += f' {key}="{value}"'
-        return result
+        return "".join([f' {key}="{value}"' for key, value in self.props.items()])
 
     def __repr__(self) -> str:
         return f"HTMLNode(tag={self.tag}, " \
                f"value={self.value}, " \
-               f"children={self.children}, " \
-               f"props={self.props})" \
+               f"children={list(self.children)}, " \
+               f"props={dict(self.props)})" \
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, HTMLNode):
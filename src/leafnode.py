@@ -1,20 +1,23 @@
-from typing import Dict, Optional
-from htmlnode import HTMLNode
+from typing import Mapping, Optional
+from htmlnode import HTMLNode, Writer
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         value: str,
         tag: Optional[str] = None,
-        props: Dict[str, str] = {},
+        props: Optional[Mapping[str, str]] = None,
     ) -> None:
-        super().__init__(tag=tag, value=value, children=[], props=props)
+        super().__init__(tag=tag, value=value, props=props)
 
-    def to_html(self) -> str:
+    def render_to(self, write: Writer) -> None:
         if not self.value:
             if self.tag != "img":
                 raise ValueError("Leaf node has no value")
         if not self.tag and self.value:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            write(self.value)
+            return
+        write(f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>")
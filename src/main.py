@@ -1,9 +1,231 @@
-from page_generator import copy_directory_contents, generate_pages_recursive
+import argparse
+import json
+import os
+from typing import Dict, List, Optional, Sequence
 
+from block_cache import BlockCache
+from build_manifest import BuildManifest, DEFAULT_MANIFEST_PATH
+from build_profile import BuildProfiler
+from page_budget import PageBudget
+from page_generator import generate_pages_recursive
+from parse_cache import ParseCache
+from precompress import DEFAULT_SUFFIXES, ENCODINGS, precompress_directory
+from static_sync import sync_directory
+from watcher import SiteRebuilder, watch
 
-def main():
-    copy_directory_contents("static", "public")
-    generate_pages_recursive("content", "template.html", "public")
+
+def main(
+    jobs: int = 1,
+    profiler: Optional[BuildProfiler] = None,
+    profile_path: Optional[str] = None,
+    profile_slowest: int = 10,
+    precompress: bool = False,
+    precompress_suffixes: Sequence[str] = DEFAULT_SUFFIXES,
+    link_static: bool = False,
+    cache: Optional[ParseCache] = None,
+    changes_path: Optional[str] = None,
+    block_cache: Optional[BlockCache] = None,
+    budget: Optional[PageBudget] = None,
+    on_budget_exceeded: str = "fail",
+):
+    manifest = BuildManifest.load(DEFAULT_MANIFEST_PATH)
+    manifest.use_template("template.html")
+    sync_directory("static", "public", manifest, jobs, link_static)
+    over_budget = generate_pages_recursive(
+        "content",
+        "template.html",
+        "public",
+        manifest,
+        jobs,
+        profiler,
+        cache,
+        block_cache,
+        budget,
+    )
+    manifest.remove_stale_outputs()
+    manifest.save()
+    if cache is not None:
+        cache.evict()
+    changes = manifest.changes()
+    if precompress:
+        # Siblings of removed outputs are deleted by precompress_directory
+        changes["removed"].extend(
+            dest + suffix
+            for dest in changes["removed"]
+            for suffix in ENCODINGS
+            if dest + suffix not in manifest.outputs and os.path.exists(dest + suffix)
+        )
+        added = set(changes["added"])
+        for sibling in precompress_directory(
+            "public", jobs, precompress_suffixes, manifest.outputs
+        ):
+            base, _ = os.path.splitext(sibling)
+            changes["added" if base in added else "changed"].append(sibling)
+    if changes_path is not None:
+        write_changes(changes_path, changes, "public")
+    if profiler is not None:
+        profiler.finish(profile_path, profile_slowest)
+    if over_budget:
+        print(f"{len(over_budget)} page(s) exceeded their budget:")
+        for error in sorted(over_budget, key=lambda e: e.source_path):
+            print(f"  {error}")
+        if on_budget_exceeded == "fail":
+            raise Exception(f"{len(over_budget)} page(s) exceeded their budget")
+
+
+def write_changes(path: str, changes: Dict[str, List[str]], dest_dir: str) -> None:
+    """Write the added, changed and removed outputs as JSON, with paths
+    relative to dest_dir, for a deploy step to upload and purge."""
+
+    relative = {
+        change: sorted(os.path.relpath(dest, dest_dir) for dest in dests)
+        for change, dests in changes.items()
+    }
+    with open(path, "w") as f:
+        json.dump(relative, f, indent=1)
+    print(
+        f"Wrote changes to '{path}': {len(relative['added'])} added, "
+        f"{len(relative['changed'])} changed, {len(relative['removed'])} removed"
+    )
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Static site generator")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of worker processes used to generate pages",
+        default=1,
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="REPORT",
+        help="Time every page and write a JSON build report to REPORT",
+    )
+    parser.add_argument(
+        "--profile-slowest",
+        type=int,
+        help="Number of slowest pages listed in the build report",
+        default=10,
+    )
+    parser.add_argument(
+        "--parse-cache",
+        type=str,
+        metavar="DIR",
+        help="Reuse rendered page bodies stored in DIR by earlier builds",
+    )
+    parser.add_argument(
+        "--parse-cache-mb",
+        type=int,
+        help="Size limit of the parse cache in megabytes",
+        default=256,
+    )
+    parser.add_argument(
+        "--block-cache",
+        type=int,
+        metavar="ENTRIES",
+        help="Render blocks repeated across pages once, keeping up to ENTRIES",
+        default=0,
+    )
+    parser.add_argument(
+        "--page-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Abandon any page that takes longer than SECONDS to generate",
+    )
+    parser.add_argument(
+        "--page-memory-mb",
+        type=int,
+        metavar="MB",
+        help="Abandon any page that needs more than MB megabytes to generate",
+    )
+    parser.add_argument(
+        "--on-budget-exceeded",
+        choices=("skip", "fail"),
+        help="Whether a build with pages over budget succeeds without them "
+        "or fails once the other pages are built",
+        default="fail",
+    )
+    parser.add_argument(
+        "--link-static",
+        action="store_true",
+        help="Hard link static files into public/ instead of copying them",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Write .gz copies of text files for the server to send",
+    )
+    parser.add_argument(
+        "--precompress-xz",
+        action="store_true",
+        help="With --precompress, also write .xz copies",
+    )
+    parser.add_argument(
+        "--changes",
+        type=str,
+        metavar="FILE",
+        help="Write the outputs added, changed and removed by this build to FILE",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After building, rebuild affected pages whenever a source changes",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        help="Seconds between checks for changes while watching",
+        default=0.05,
+    )
+    args = parser.parse_args()
+    cache = (
+        ParseCache(args.parse_cache, args.parse_cache_mb * 1024 * 1024)
+        if args.parse_cache
+        else None
+    )
+    budget = (
+        PageBudget(
+            args.page_timeout,
+            args.page_memory_mb * 1024 * 1024 if args.page_memory_mb else None,
+        )
+        if args.page_timeout or args.page_memory_mb
+        else None
+    )
+    block_cache = BlockCache(args.block_cache) if args.block_cache > 0 else None
+    precompress_suffixes = (
+        DEFAULT_SUFFIXES + (".xz",) if args.precompress_xz else DEFAULT_SUFFIXES
+    )
+    main(
+        jobs=args.jobs,
+        profiler=BuildProfiler() if args.profile else None,
+        profile_path=args.profile,
+        profile_slowest=args.profile_slowest,
+        precompress=args.precompress,
+        precompress_suffixes=precompress_suffixes,
+        link_static=args.link_static,
+        cache=cache,
+        changes_path=args.changes,
+        block_cache=block_cache,
+        budget=budget,
+        on_budget_exceeded=args.on_budget_exceeded,
+    )
+    if args.watch:
+        rebuilder = SiteRebuilder(
+            "content",
+            "static",
+            "template.html",
+            "public",
+            BuildManifest.load(DEFAULT_MANIFEST_PATH),
+            jobs=args.jobs,
+            cache=cache,
+            block_cache=block_cache,
+            budget=budget,
+            link_static=args.link_static,
+            precompress=precompress_suffixes if args.precompress else (),
+        )
+        try:
+            watch(rebuilder, args.watch_interval)
+        except KeyboardInterrupt:
+            print("\nKeyboard interrupt received. Stopping watch...")
@@ -1,8 +1,10 @@
 from enum import Enum
 import re
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
-from htmlnode import HTMLNode
+from block_cache import BlockCache
+from fragmentnode import FragmentNode
+from htmlnode import HTMLNode, Writer
 from leafnode import LeafNode
 from parentnode import ParentNode
 from textnode import TextNode, TextNodeType
@@ -22,81 +24,239 @@ class MarkdownBlockType(Enum):
 class MarkdownFormattingError(Exception):
     """A custom error representing incorrect Markdown formatting."""
 
-    def __init__(self, markdown_text: str, message: str):
+    def __init__(
+        self,
+        markdown_text: str,
+        message: str,
+        source_path: Optional[str] = None,
+        position: Optional[int] = None,
+    ):
         self.markdown_text = markdown_text
         self.message = message
+        self.source_path = source_path
+        # Index into markdown_text where the problem was found, if known
+        self.position = position
         super().__init__(message)
 
+    def __str__(self) -> str:
+        if self.source_path:
+            return f"{self.source_path}: {self.message}"
+        return self.message
+
+    def __reduce__(self):
+        # Keeps the error intact when it crosses a process boundary
+        return (
+            MarkdownFormattingError,
+            (self.markdown_text, self.message, self.source_path, self.position),
+        )
+
+
+# Keeps the regexes the link and image scanner replaced, for reference:
+#   images:           !\[(.*?)\]\((.*?)\)
+#   links and images: (!?)\[(.*?)\]\((.*?)\)
+# Both backtrack through the rest of the line at every unmatched "[", so
+# a line of n unmatched brackets took O(n^2) time.
+
+
+def _iter_bracket_matches(
+    text: str, images_only: bool = False
+) -> Iterator[Tuple[int, int, bool, str, str]]:
+    """Yield (start, end, is_image, label, url) for each [label](url) and
+    ![label](url) in text, or only each image with images_only, exactly
+    as finditer with the regexes above would, but in linear time.
+
+    No match spans lines. Within a line, every "[" followed by "](" and
+    then ")" starts a match, so once a "[" fails to, nothing later in
+    the line can match and the rest of it is skipped."""
+
+    line_start = 0
+    length = len(text)
+    while line_start <= length:
+        line_end = text.find("\n", line_start)
+        if line_end == -1:
+            line_end = length
+        position = line_start
+        while True:
+            if images_only:
+                start = text.find("![", position, line_end)
+                bracket = start + 1
+            else:
+                start = bracket = text.find("[", position, line_end)
+                if bracket > position and text[bracket - 1] == "!":
+                    start = bracket - 1
+            if start == -1:
+                break
+            label_end = text.find("](", bracket + 1, line_end)
+            if label_end == -1:
+                break
+            url_end = text.find(")", label_end + 2, line_end)
+            if url_end == -1:
+                break
+            yield (
+                start,
+                url_end + 1,
+                start != bracket,
+                text[bracket + 1 : label_end],
+                text[label_end + 2 : url_end],
+            )
+            position = url_end + 1
+        line_start = line_end + 1
+
 
 def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
     """Extract Markdown image information from a string."""
 
-    return re.findall(
-        r"!\[(.*?)\]\((.*?)\)",  # Regex matches for Markdown images ( ![alt](link) )
-        text,
-    )
+    return [
+        (label, url)
+        for _, _, _, label, url in _iter_bracket_matches(text, images_only=True)
+    ]
 
 
 def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
     """Extract Markdown link information from a string. Ignores images."""
 
-    text_sanitized = text
-    image = re.search(r"!\[(.*?)\]\((.*?)\)", text)
-    if image:
-        image_position_in_text = image.span()
-        text_sanitized = (
-            text[: image_position_in_text[0]] + text[image_position_in_text[1] :]
+    return [
+        (label, url)
+        for _, _, is_image, label, url in _iter_bracket_matches(text)
+        if not is_image
+    ]
+
+
+_HEADING_PATTERN = re.compile(r"#{1,6} ")
+
+
+class _BlockClassifier:
+    """Works out the type of a Markdown block one line at a time.
+
+    Each candidate type is dropped as soon as a line rules it out, so no
+    line is looked at more than once."""
+
+    def __init__(self, first_line: str) -> None:
+        self.line_count = 1
+        stripped = first_line.rstrip()
+        # A heading is its own block and loses its trailing space, so "# "
+        # is the paragraph "#"
+        self.heading = _HEADING_PATTERN.match(stripped) is not None
+        self.fenced = first_line.startswith("```")
+        # A fence opened and closed on its own first line, e.g. ```code```
+        self.closed = self.fenced and len(stripped) >= 6 and stripped.endswith("```")
+        self.quote = first_line.startswith(">")
+        self.unordered_list = first_line[:2] in ("* ", "- ")
+        self.ordered_list = first_line.startswith("1. ")
+
+    def add(self, line: str) -> None:
+        """Account for the next line of the block."""
+
+        self.line_count += 1
+        if self.fenced:
+            self.closed = line.rstrip().endswith("```")
+            return
+        self.quote = self.quote and line.startswith(">")
+        self.unordered_list = self.unordered_list and line[:2] in ("* ", "- ")
+        self.ordered_list = self.ordered_list and line.startswith(
+            f"{self.line_count}. "
         )
-    return re.findall(
-        r"\[(.*?)\]\((.*?)\)",  # Regex matches for Markdown links ( [alt](link) )
-        text_sanitized,
-    )
+
+    def block_type(self) -> MarkdownBlockType:
+        """Return the type of the block given the lines seen so far."""
+
+        if self.heading:
+            return MarkdownBlockType.HEADING
+        if self.fenced:
+            return MarkdownBlockType.CODE
+        if self.quote:
+            return MarkdownBlockType.QUOTE
+        if self.unordered_list:
+            return MarkdownBlockType.UNORDERED_LIST
+        if self.ordered_list:
+            return MarkdownBlockType.ORDERED_LIST
+        return MarkdownBlockType.PARAGRAPH
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Tuple[str, MarkdownBlockType]]:
+    """Yield each block of a Markdown document along with its type.
+
+    The document is read one line at a time, so lines can come straight
+    from an open file. Blocks are separated by blank lines, except inside
+    a fenced code block, which runs until its closing fence. A heading
+    is always a block of its own line."""
+
+    block_lines: List[str] = []
+    classifier: Optional[_BlockClassifier] = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if classifier is not None and classifier.fenced:
+            block_lines.append(line)
+            classifier.add(line)
+            if classifier.closed:
+                yield "\n".join(block_lines).strip(), MarkdownBlockType.CODE
+                block_lines, classifier = [], None
+            continue
+        if not line.strip():
+            if classifier is not None:
+                yield "\n".join(block_lines).strip(), classifier.block_type()
+                block_lines, classifier = [], None
+            continue
+        if classifier is None:
+            line = line.lstrip()
+            block_lines.append(line)
+            classifier = _BlockClassifier(line)
+            if classifier.heading or classifier.closed:
+                yield line.rstrip(), classifier.block_type()
+                block_lines, classifier = [], None
+            continue
+        block_lines.append(line)
+        classifier.add(line)
+    if classifier is not None:
+        yield "\n".join(block_lines).strip(), classifier.block_type()
 
 
 def markdown_to_blocks(markdown: str) -> List[str]:
     """Separate a Markdown document into blocks.
 
     A Markdown block is separated by an empty line, which is represented
-    as two newline (\\n) characters.
+    as two newline (\\n) characters. Fenced code blocks are kept whole,
+    even if they contain empty lines.
     """
 
-    markdown_split_newline: List[str] = markdown.split("\n\n")
-    markdown_split_newline_sanitized = [
-        text.strip().lstrip("\n") for text in markdown_split_newline if text is not None
-    ]
-    return markdown_split_newline_sanitized
+    return [block for block, _ in iter_blocks(markdown.split("\n"))]
 
 
 def block_to_block_type(markdown_block: str) -> MarkdownBlockType:
     """Calculate the type of Markdown block given."""
 
-    if re.search(r"(?<!.)(#{1,6} )", markdown_block):
-        return MarkdownBlockType.HEADING
-    if re.search(r"^```", markdown_block) and re.search(r"```$", markdown_block):
-        return MarkdownBlockType.CODE
-    markdown_block_split = markdown_block.split("\n")
-    if all(">" == x[0] for x in markdown_block_split):
-        return MarkdownBlockType.QUOTE
-    if all("* " == x[:2] or "- " == x[:2] for x in markdown_block_split):
-        return MarkdownBlockType.UNORDERED_LIST
-    is_block_ordered_list = True
-    for i, block in enumerate(markdown_block_split):
-        if f"{i+1}. " != block[:3]:
-            is_block_ordered_list = False
-    return (
-        MarkdownBlockType.ORDERED_LIST
-        if is_block_ordered_list
-        else MarkdownBlockType.PARAGRAPH
-    )
+    lines = markdown_block.split("\n")
+    classifier = _BlockClassifier(lines[0])
+    for line in lines[1:]:
+        classifier.add(line)
+    return classifier.block_type()
 
 
-def markdown_to_html_node(markdown_document: str) -> HTMLNode:
-    """Convert an entire Markdown file into a large div HTMLNode."""
+def markdown_to_html_node(
+    markdown_document: Union[str, Iterable[str]],
+    cache: Optional[BlockCache] = None,
+) -> HTMLNode:
+    """Convert an entire Markdown file into a large div HTMLNode.
+
+    The document may be given as a string or as an iterable of lines,
+    such as an open file."""
+
+    if isinstance(markdown_document, str):
+        markdown_document = markdown_document.split("\n")
+    return blocks_to_html_node(iter_blocks(markdown_document), cache)
+
+
+def blocks_to_html_node(
+    blocks: Iterable[Tuple[str, MarkdownBlockType]],
+    cache: Optional[BlockCache] = None,
+) -> HTMLNode:
+    """Convert typed Markdown blocks, as yielded by iter_blocks, into a
+    large div HTMLNode.
+
+    With a cache, each block is looked up there first, and a converted
+    block is stored as a FragmentNode, which renders its HTML once, when
+    the tree is first rendered."""
 
-    markdown_blocks = markdown_to_blocks(markdown_document)
-    markdown_blocks_and_types = [
-        (block, block_to_block_type(block)) for block in markdown_blocks
-    ]
     block_type_conversion_map = {
         MarkdownBlockType.HEADING: _heading_to_html_node,
         MarkdownBlockType.CODE: _code_to_html_node,
@@ -105,18 +265,212 @@ def markdown_to_html_node(markdown_document: str) -> HTMLNode:
         MarkdownBlockType.ORDERED_LIST: _ordered_list_to_html_node,
         MarkdownBlockType.PARAGRAPH: _paragraph_to_html_node,
     }
-    blocks_to_html_nodes = [
-        block_type_conversion_map[block_type](block)
-        for block, block_type in markdown_blocks_and_types
-    ]
+    if cache is None:
+        blocks_to_html_nodes = [
+            block_type_conversion_map[block_type](block)
+            for block, block_type in blocks
+        ]
+        return ParentNode(blocks_to_html_nodes, "div")
+    blocks_to_html_nodes = []
+    for block, block_type in blocks:
+        key = cache.key(block, block_type.value)
+        node = cache.get(key)
+        if node is None:
+            converted = block_type_conversion_map[block_type](block)
+            node = FragmentNode(converted)
+            cache.put(key, node)
+        blocks_to_html_nodes.append(node)
     return ParentNode(blocks_to_html_nodes, "div")
 
 
+def markdown_to_html(markdown_document: Union[str, Iterable[str]]) -> str:
+    """Convert an entire Markdown file straight into HTML.
+
+    Returns the same HTML as markdown_to_html_node(...).to_html() without
+    building any HTMLNodes. Use markdown_to_html_node when the tree
+    itself is needed."""
+
+    if isinstance(markdown_document, str):
+        markdown_document = markdown_document.split("\n")
+    return blocks_to_html(iter_blocks(markdown_document))
+
+
+def blocks_to_html(blocks: Iterable[Tuple[str, MarkdownBlockType]]) -> str:
+    """Convert typed Markdown blocks, as yielded by iter_blocks, straight
+    into HTML."""
+
+    parts: List[str] = []
+    render_blocks_to(blocks, parts.append)
+    return "".join(parts)
+
+
+class _RenderError(ValueError):
+    """A node that blocks_to_html_node would build but could not render."""
+
+
+def render_blocks_to(
+    blocks: Iterable[Tuple[str, MarkdownBlockType]], write: Writer
+) -> None:
+    """Write the HTML for typed Markdown blocks, as yielded by
+    iter_blocks, to write. The output and the errors raised are those of
+    blocks_to_html_node(blocks).render_to(write)."""
+
+    renderers = {
+        MarkdownBlockType.HEADING: _render_heading_to,
+        MarkdownBlockType.CODE: _render_code_to,
+        MarkdownBlockType.QUOTE: _render_quote_to,
+        MarkdownBlockType.UNORDERED_LIST: _render_unordered_list_to,
+        MarkdownBlockType.ORDERED_LIST: _render_ordered_list_to,
+        MarkdownBlockType.PARAGRAPH: _render_paragraph_to,
+    }
+    empty = True
+    # The tree is only rendered once every block has been parsed, so a
+    # block that can't be rendered must not hide a parse error after it
+    render_error: Optional[_RenderError] = None
+    for block, block_type in blocks:
+        if empty:
+            write("<div>")
+            empty = False
+        try:
+            renderers[block_type](block, write)
+        except _RenderError as e:
+            if render_error is None:
+                render_error = e
+    if render_error is not None:
+        raise ValueError(*render_error.args)
+    if empty:
+        raise ValueError("ParentNode has no children")
+    write("</div>")
+
+
+def _render_leaf_to(write: Writer, tag: str, value: str) -> None:
+    if not value:
+        raise _RenderError("Leaf node has no value")
+    write(f"<{tag}>{value}</{tag}>")
+
+
+def _render_text_nodes_to(write: Writer, tag: str, textnodes: List[TextNode]) -> None:
+    if not textnodes:
+        raise _RenderError("ParentNode has no children")
+    write(f"<{tag}>")
+    for textnode in textnodes:
+        _render_text_node_to(textnode, write)
+    write(f"</{tag}>")
+
+
+_INLINE_TAGS = {
+    TextNodeType.BOLD: "b",
+    TextNodeType.ITALIC: "i",
+    TextNodeType.CODE: "code",
+}
+# Tags of the tokens that can hold nested markup
+_NESTING_TAGS = {
+    TextNodeType.BOLD: "b",
+    TextNodeType.ITALIC: "i",
+    TextNodeType.LINK: "a",
+}
+
+
+def _render_text_node_to(text_node: TextNode, write: Writer) -> None:
+    """Write the HTML of text_node_to_html_node(text_node) to write."""
+
+    if text_node.children:
+        tag = _NESTING_TAGS[text_node.text_type]
+        if text_node.url:
+            write(f'<{tag} href="{text_node.url}">')
+        else:
+            write(f"<{tag}>")
+        for child in text_node.children:
+            _render_text_node_to(child, write)
+        write(f"</{tag}>")
+        return
+    text_type = text_node.text_type
+    if text_type == TextNodeType.IMAGE:
+        write(f'<img src="{text_node.url or ""}" alt="{text_node.text}"></img>')
+        return
+    if not text_node.text:
+        raise _RenderError("Leaf node has no value")
+    if text_type == TextNodeType.TEXT:
+        write(text_node.text)
+    elif text_type == TextNodeType.LINK:
+        if text_node.url:
+            write(f'<a href="{text_node.url}">{text_node.text}</a>')
+        else:
+            write(f"<a>{text_node.text}</a>")
+    else:
+        tag = _INLINE_TAGS[text_type]
+        write(f"<{tag}>{text_node.text}</{tag}>")
+
+
+def _render_heading_to(block: str, write: Writer) -> None:
+    heading_level, heading_text = _split_heading(block)
+    textnodes = text_to_textnodes(heading_text)
+    if len(textnodes) == 1:
+        _render_leaf_to(write, f"h{heading_level}", heading_text)
+    else:
+        _render_text_nodes_to(write, f"h{heading_level}", textnodes)
+
+
+def _render_code_to(block: str, write: Writer) -> None:
+    code_text = block.strip("`").strip()
+    if not code_text:
+        raise _RenderError("Leaf node has no value")
+    write(f"<pre><code>{code_text}</code></pre>")
+
+
+def _render_quote_to(block: str, write: Writer) -> None:
+    quote_text = block.replace(">", "").replace("\n ", " ").strip()
+    _render_leaf_to(write, "blockquote", quote_text)
+
+
+def _render_list_items_to(write: Writer, tag: str, items: List[str]) -> None:
+    write(f"<{tag}>")
+    for textnodes in list(map(text_to_textnodes, items)):
+        if len(textnodes) == 1 and not textnodes[0].children:
+            _render_leaf_to(write, "li", textnodes[0].text)
+        else:
+            _render_text_nodes_to(write, "li", textnodes)
+    write(f"</{tag}>")
+
+
+def _render_unordered_list_to(block: str, write: Writer) -> None:
+    _render_list_items_to(write, "ul", [x[2:] for x in block.split("\n")])
+
+
+def _render_ordered_list_to(block: str, write: Writer) -> None:
+    _render_list_items_to(
+        write, "ol", [x[x.index(". ") + 2 :] for x in block.split("\n")]
+    )
+
+
+def _render_paragraph_to(block: str, write: Writer) -> None:
+    block_sanitized = block.strip("\n").strip().replace("\n", " ")
+    textnodes = text_to_textnodes(block_sanitized)
+    if len(textnodes) != 1 or textnodes[0].children:
+        _render_text_nodes_to(write, "p", textnodes)
+        return
+    textnode = textnodes[0]
+    if textnode.text_type == TextNodeType.LINK and textnode.url:
+        if not textnode.text:
+            raise _RenderError("Leaf node has no value")
+        write(f'<a href="{textnode.url}">{textnode.text}</a>')
+    elif textnode.text_type == TextNodeType.IMAGE and textnode.url:
+        write(f'<img src="{textnode.url}" alt="{textnode.text}"></img>')
+    else:
+        _render_leaf_to(write, "p", block_sanitized)
+
+
+def _split_heading(block: str) -> Tuple[int, str]:
+    """Return the level and the text of a 'heading' Markdown block."""
+
+    heading_text = block.lstrip("# ")
+    return len(block) - len(heading_text) - 1, heading_text
+
+
 def _heading_to_html_node(block: str) -> HTMLNode:
     """Convert a 'heading' Markdown block into an HTMLNode."""
 
-    heading_text = block.lstrip("# ")
-    heading_level = len(block) - len(heading_text) - 1
+    heading_level, heading_text = _split_heading(block)
     textnodes = text_to_textnodes(heading_text)
     if len(textnodes) == 1:
         return LeafNode(heading_text, f"h{heading_level}")
@@ -147,7 +501,7 @@ def _unordered_list_to_html_node(block: str) -> HTMLNode:
     list_text = [x[2:] for x in list_text]
     textnodes = list(map(text_to_textnodes, list_text))
     for entry in textnodes:
-        if len(entry) != 1:
+        if len(entry) != 1 or entry[0].children:
             entry_as_html = list(map(text_node_to_html_node, entry))
             ul_children.append(ParentNode(entry_as_html, "li"))
         else:
@@ -160,10 +514,10 @@ def _ordered_list_to_html_node(block: str) -> HTMLNode:
 
     ol_children: List[HTMLNode] = []
     list_text = block.split("\n")
-    list_text = [x[3:] for x in list_text]
+    list_text = [x[x.index(". ") + 2 :] for x in list_text]
     textnodes = list(map(text_to_textnodes, list_text))
     for entry in textnodes:
-        if len(entry) != 1:
+        if len(entry) != 1 or entry[0].children:
             entry_as_html = list(map(text_node_to_html_node, entry))
             ol_children.append(ParentNode(entry_as_html, "li"))
         else:
@@ -176,7 +530,8 @@ def _paragraph_to_html_node(block: str) -> HTMLNode:
 
     block_sanitized = block.strip("\n").strip().replace("\n", " ")
     block_textnode = text_to_textnodes(block_sanitized)
-    if len(block_textnode) == 1:
+    # Tokens with nested markup are always rendered through the tree
+    if len(block_textnode) == 1 and not block_textnode[0].children:
         if block_textnode[0].text_type == TextNodeType.LINK and block_textnode[0].url:
             return LeafNode(
                 block_textnode[0].text, "a", {"href": block_textnode[0].url}
@@ -193,8 +548,14 @@ def _paragraph_to_html_node(block: str) -> HTMLNode:
 def extract_title(markdown_document: str) -> str:
     """Return the title text of a Markdown file."""
 
-    mardown_in_blocks = markdown_to_blocks(markdown_document)
-    for block in mardown_in_blocks:
+    return title_from_blocks(markdown_to_blocks(markdown_document), markdown_document)
+
+
+def title_from_blocks(blocks: Iterable[str], markdown_document: str) -> str:
+    """Return the title text from the blocks of a Markdown file, as
+    extract_title does for the whole file."""
+
+    for block in blocks:
         if re.search(r"(?<!.)(# )", block):
             return block[2:]
     raise MarkdownFormattingError(
@@ -202,6 +563,70 @@ def extract_title(markdown_document: str) -> str:
     )
 
 
+class Heading(NamedTuple):
+    """An entry in a document's heading outline."""
+
+    level: int
+    text: str
+
+
+class MarkdownDocument(NamedTuple):
+    """A parsed Markdown document and what was found in it.
+
+    Links and images are (text, url) pairs in document order, taken from
+    the rendered tree, so they are exactly the ones the page will have."""
+
+    root: HTMLNode
+    title: str
+    headings: List[Heading]
+    links: List[Tuple[str, str]]
+    images: List[Tuple[str, str]]
+
+
+def parse_document(
+    markdown_document: Union[str, Iterable[str]],
+    cache: Optional[BlockCache] = None,
+) -> MarkdownDocument:
+    """Parse a Markdown document once into its HTMLNode tree, title,
+    heading outline, links and images.
+
+    The document may be given as a string or as an iterable of lines,
+    and blocks are memoized in cache if one is given. Raises
+    MarkdownFormattingError if the document has no title."""
+
+    if isinstance(markdown_document, str):
+        blocks = list(iter_blocks(markdown_document.split("\n")))
+    else:
+        blocks = list(iter_blocks(markdown_document))
+        markdown_document = "\n\n".join(block for block, _ in blocks)
+    root = blocks_to_html_node(blocks, cache)
+    title = title_from_blocks((block for block, _ in blocks), markdown_document)
+    headings = [
+        Heading(*_split_heading(block))
+        for block, block_type in blocks
+        if block_type == MarkdownBlockType.HEADING
+    ]
+    links: List[Tuple[str, str]] = []
+    images: List[Tuple[str, str]] = []
+    stack: List[HTMLNode] = [root]
+    while stack:
+        node = stack.pop()
+        if node.tag == "a":
+            links.append((_plain_text(node), node.props.get("href", "")))
+        elif node.tag == "img":
+            images.append((node.props.get("alt", ""), node.props.get("src", "")))
+        stack.extend(reversed(node.children))
+    return MarkdownDocument(root, title, headings, links, images)
+
+
+def _plain_text(node: HTMLNode) -> str:
+    """Return the text inside node, without any markup."""
+
+    if not node.children:
+        return node.value or ""
+    return "".join(map(_plain_text, node.children))
+
+
 def split_nodes_delimiter(
     old_nodes: List[TextNode], delimiter: str, text_type: TextNodeType
 ) -> List[TextNode]:
@@ -217,21 +642,22 @@ def split_nodes_delimiter(
         if len(node_split_by_delimiter) == 1:
             output.append(node)
             continue
-        if len(node_split_by_delimiter) == 2:
+        if len(node_split_by_delimiter) % 2 == 0:
+            # An odd number of delimiters; the last one is never closed
             raise MarkdownFormattingError(
                 markdown_text=node.text,
                 message="Invalid Markdown syntax. No closing delimiter.",
+                position=node.text.rfind(delimiter),
+            )
+        for i, node_text in enumerate(node_split_by_delimiter):
+            if not node_text:
+                continue
+            # Text outside delimiters lands on even indices, text inside on odd
+            output.append(
+                TextNode(node_text, TextNodeType.TEXT)
+                if i % 2 == 0
+                else TextNode(node_text, TextNodeType(text_type))
             )
-        new_textnodes = [
-            TextNode(node_text, TextNodeType.TEXT)
-            if node_split_by_delimiter.index(node_text) % 2
-            == 0  # Regular TextNodes will be index 0 and 2
-            else TextNode(
-                node_text, TextNodeType(text_type)
-            )  # New type node will be index 1
-            for node_text in node_split_by_delimiter
-        ]
-        output.extend([x for x in new_textnodes if x.text])
 
     return output
 
@@ -242,29 +668,22 @@ def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
 
     output: List[TextNode] = []
     for node in old_nodes:
-        node_split: List[TextNode] = []
-        if not isinstance(node, TextNode):
-            output.append(node)
-            continue
-        images_in_node = extract_markdown_images(node.text)
-        if not images_in_node:
+        if not isinstance(node, TextNode) or node.text_type != TextNodeType.TEXT:
             output.append(node)
             continue
-        for i, image in enumerate(images_in_node):
-            alt = image[0]
-            link = image[1]
-            node_with_image_removed: List[str] = node.text.split(f"![{alt}]({link})", 1)
-            node_split.append(TextNode(node_with_image_removed[0], TextNodeType.TEXT))
-            node_split.append(TextNode(alt, TextNodeType.IMAGE, link))
-            if i == len(images_in_node) - 1:
-                node_split.append(
-                    TextNode(node_with_image_removed[1], TextNodeType.TEXT)
+        _split_node_on_matches(
+            node,
+            (
+                (start, end, label, url)
+                for start, end, _, label, url in _iter_bracket_matches(
+                    node.text, images_only=True
                 )
-            else:
-                node = TextNode(node_with_image_removed[1], TextNodeType.TEXT)
-        output.extend(node_split)
+            ),
+            TextNodeType.IMAGE,
+            output,
+        )
 
-    return [x for x in output if x.text]
+    return output
 
 
 def split_nodes_link(old_nodes: List[TextNode]) -> List[TextNode]:
@@ -273,33 +692,58 @@ def split_nodes_link(old_nodes: List[TextNode]) -> List[TextNode]:
 
     output: List[TextNode] = []
     for node in old_nodes:
-        node_split: List[TextNode] = []
-        if not isinstance(node, TextNode):
+        if not isinstance(node, TextNode) or node.text_type != TextNodeType.TEXT:
             output.append(node)
             continue
-        links_in_node = extract_markdown_links(node.text)
-        if not links_in_node:
-            output.append(node)
-            continue
-        for i, link_data in enumerate(links_in_node):
-            alt = link_data[0]
-            link = link_data[1]
-            node_text_split: List[str] = node.text.split(f"[{alt}]({link})", 1)
-            node_split.append(TextNode(node_text_split[0], TextNodeType.TEXT))
-            node_split.append(TextNode(alt, TextNodeType.LINK, link))
-            if i == len(links_in_node) - 1:
-                node_split.append(TextNode(node_text_split[1], TextNodeType.TEXT))
-            else:
-                node = TextNode(node_text_split[1], TextNodeType.TEXT)
-        output.extend(node_split)
+        _split_node_on_matches(
+            node,
+            (
+                (start, end, label, url)
+                for start, end, is_image, label, url in _iter_bracket_matches(node.text)
+                if not is_image
+            ),
+            TextNodeType.LINK,
+            output,
+        )
 
-    return [x for x in output if x.text]
+    return output
+
+
+def _split_node_on_matches(
+    node: TextNode,
+    matches: Iterable[Tuple[int, int, str, str]],
+    text_type: TextNodeType,
+    output: List[TextNode],
+) -> None:
+    """Append node to output, split around (start, end, text, url) spans.
+
+    Each span becomes a TextNode of text_type and the text between spans
+    stays as 'text', so the node is only read once."""
+
+    text = node.text
+    position = 0
+    for start, end, match_text, url in matches:
+        if start > position:
+            output.append(TextNode(text[position:start], TextNodeType.TEXT))
+        output.append(TextNode(match_text, text_type, url))
+        position = end
+    if position == 0:
+        if text:
+            output.append(node)
+    elif position < len(text):
+        output.append(TextNode(text[position:], TextNodeType.TEXT))
 
 
 def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
     """Converts given TextNode to its corresponding HTMLNode according
     to its text_type."""
 
+    if text_node.children:
+        return ParentNode(
+            list(map(text_node_to_html_node, text_node.children)),
+            _NESTING_TAGS[text_node.text_type],
+            {"href": text_node.url} if text_node.url else {},
+        )
     conversion_map = {
         TextNodeType.TEXT: LeafNode(value=text_node.text),
         TextNodeType.BOLD: LeafNode(tag="b", value=text_node.text),
@@ -324,12 +768,137 @@ def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
 
 
 def text_to_textnodes(text: str) -> List[TextNode]:
-    """Convert a string of text into TextNodes"""
-
-    nodes: List[TextNode] = [TextNode(text, TextNodeType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextNodeType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextNodeType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextNodeType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """Convert a string of text into TextNodes.
+
+    The text is tokenized in a single left-to-right scan. Code spans hold
+    plain text and take precedence over links whose brackets they cross,
+    while the text of a bold, italic or link token may itself contain
+    inline markup, which is kept as the token's children."""
+
+    nodes: List[TextNode] = []
+    _scan_inline(text, nodes)
     return nodes
+
+
+_INLINE_MARKERS = re.compile(r"[*`!\[]")
+# Used once no link can follow, so brackets are no longer stopped at
+_DELIMITER_MARKERS = re.compile(r"[*`]")
+_DELIMITED_TYPES = {
+    "**": TextNodeType.BOLD,
+    "*": TextNodeType.ITALIC,
+    "`": TextNodeType.CODE,
+}
+
+
+def _scan_inline(text: str, output: List[TextNode]) -> None:
+    """Append the inline tokens found in text to output."""
+
+    position = 0  # Where the next search for markup starts
+    text_start = 0  # Start of the plain text not yet emitted
+    length = len(text)
+    markers = _INLINE_MARKERS
+    while position < length:
+        marker = markers.search(text, position)
+        if marker is None:
+            break
+        start = marker.start()
+        char = text[start]
+        if char == "!" or char == "[":
+            bracket = start + 1 if char == "!" else start
+            if char == "!" and text[bracket : bracket + 1] != "[":
+                position = start + 1
+                continue
+            link = _match_link(text, bracket)
+            if link is None:
+                # No "](" followed by ")" after this bracket, so there is
+                # none after any later one either; looking again at each
+                # of them would take quadratic time
+                markers = _DELIMITER_MARKERS
+                position = bracket + 1
+                continue
+            label, url, end = link
+            tick = _crossing_code_span(text, bracket, end)
+            if tick != -1:
+                # The code span wins; the brackets before it are text
+                position = tick
+                continue
+            if char == "!":
+                token = TextNode(label, TextNodeType.IMAGE, url)
+            else:
+                token = _link_node(label, url)
+        else:
+            delimiter = "**" if text.startswith("**", start) else char
+            close = text.find(delimiter, start + len(delimiter))
+            if close == -1:
+                raise MarkdownFormattingError(
+                    markdown_text=text,
+                    message="Invalid Markdown syntax. No closing delimiter.",
+                    position=start,
+                )
+            end = close + len(delimiter)
+            inner = text[start + len(delimiter) : close]
+            if delimiter == "`":
+                token = TextNode(inner, TextNodeType.CODE)
+            else:
+                token = _nesting_node(inner, _DELIMITED_TYPES[delimiter])
+        if start > text_start:
+            output.append(TextNode(text[text_start:start], TextNodeType.TEXT))
+        if token.text or token.url:
+            output.append(token)
+        position = text_start = end
+    if text_start < length:
+        output.append(TextNode(text[text_start:], TextNodeType.TEXT))
+
+
+def _match_link(text: str, bracket: int) -> Optional[Tuple[str, str, int]]:
+    """Match [label](url) at the '[' at index bracket.
+
+    Returns the label, the url and the index just past the match, or
+    None if there is no complete link there."""
+
+    label_end = text.find("](", bracket + 1)
+    if label_end == -1:
+        return None
+    url_end = text.find(")", label_end + 2)
+    if url_end == -1:
+        return None
+    return text[bracket + 1 : label_end], text[label_end + 2 : url_end], url_end + 1
+
+
+def _crossing_code_span(text: str, start: int, end: int) -> int:
+    """Return the index of the first backtick between start and end that
+    opens a code span closing at or after end, or -1 if there is none."""
+
+    tick = text.find("`", start, end)
+    while tick != -1:
+        close = text.find("`", tick + 1)
+        if close == -1:
+            # Unclosed; reported when the text around it is scanned
+            return -1
+        if close >= end:
+            return tick
+        tick = text.find("`", close + 1, end)
+    return -1
+
+
+def _link_node(label: str, url: str) -> TextNode:
+    """Build a link TextNode, keeping any inline markup in its label."""
+
+    return _nesting_node(label, TextNodeType.LINK, url)
+
+
+def _nesting_node(
+    text: str, text_type: TextNodeType, url: Optional[str] = None
+) -> TextNode:
+    """Build a bold, italic or link TextNode, keeping any inline markup
+    in its text as children."""
+
+    if _INLINE_MARKERS.search(text) is None:
+        return TextNode(text, text_type, url)
+    children: List[TextNode] = []
+    _scan_inline(text, children)
+    if all(child.text_type == TextNodeType.TEXT for child in children):
+        return TextNode(text, text_type, url)
+    return TextNode(
+        "".join(child.text for child in children), text_type, url, children
+    )
@@ -0,0 +1,104 @@
+import os
+import signal
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import resource
+
+    _HAS_RESOURCE = True
+except ImportError:  # Not on Windows; memory budgets aren't enforced there
+    _HAS_RESOURCE = False
+
+from build_profile import StageTimer
+
+
+class PageBudgetExceeded(Exception):
+    """A page took longer or needed more memory than its budget allows."""
+
+    def __init__(
+        self, source_path: str, resource_name: str, limit: float, stage: Optional[str]
+    ) -> None:
+        self.source_path = source_path
+        # "time" (limit in seconds) or "memory" (limit in bytes)
+        self.resource_name = resource_name
+        self.limit = limit
+        # The stage of generate_page that was running, if any
+        self.stage = stage
+        super().__init__(source_path, resource_name, limit, stage)
+
+    def __str__(self) -> str:
+        if self.resource_name == "time":
+            limit = f"{self.limit:g} s"
+        else:
+            limit = f"{self.limit / 1024 / 1024:g} MB"
+        stage = f"the {self.stage} stage" if self.stage else "setup"
+        return (
+            f"{self.source_path}: exceeded the {limit} {self.resource_name} "
+            f"budget during {stage}"
+        )
+
+
+class PageBudget:
+    """Wall-time and memory limits for generating a single page.
+
+    The limits are enforced in the process that generates the page,
+    which for a parallel build is a worker: the time limit with a
+    SIGALRM timer, and the memory limit by capping the process's address
+    space at its current size plus memory_bytes, so an allocation past
+    the budget raises MemoryError. Either way the page is abandoned with
+    PageBudgetExceeded and the process carries on with the next page."""
+
+    def __init__(
+        self,
+        seconds: Optional[float] = None,
+        memory_bytes: Optional[int] = None,
+    ) -> None:
+        self.seconds = seconds
+        self.memory_bytes = memory_bytes
+
+    @contextmanager
+    def enforce(self, source_path: str, timer: StageTimer) -> Iterator[None]:
+        """Run the body within the budget, raising PageBudgetExceeded
+        with the stage timer's current stage if it is exceeded."""
+
+        def on_alarm(signum, frame):
+            raise PageBudgetExceeded(source_path, "time", self.seconds, timer.current)
+
+        previous_handler = None
+        if self.seconds:
+            previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, self.seconds)
+        previous_limit = self._limit_memory()
+        try:
+            yield
+        except MemoryError:
+            if previous_limit is None or self.memory_bytes is None:
+                raise
+            raise PageBudgetExceeded(
+                source_path, "memory", self.memory_bytes, timer.current
+            ) from None
+        finally:
+            if previous_handler is not None:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous_handler)
+            if previous_limit is not None:
+                resource.setrlimit(resource.RLIMIT_AS, previous_limit)
+
+    def _limit_memory(self):
+        """Cap the address space at its current size plus memory_bytes.
+        Returns the previous limits, or None if memory isn't limited."""
+
+        if not self.memory_bytes or not _HAS_RESOURCE:
+            return None
+        try:
+            with open("/proc/self/statm") as f:
+                address_space = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:  # Without /proc the current size isn't known
+            return None
+        previous_limit = resource.getrlimit(resource.RLIMIT_AS)
+        limit = address_space + self.memory_bytes
+        if previous_limit[1] != resource.RLIM_INFINITY:
+            limit = min(limit, previous_limit[1])
+        resource.setrlimit(resource.RLIMIT_AS, (limit, previous_limit[1]))
+        return previous_limit
@@ -1,60 +1,328 @@
+import hashlib
+import io
 import os
-import shutil
-from markdown_operations import extract_title, markdown_to_html_node
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
+from atomic_write import AtomicWriter
+from block_cache import BlockCache
+from build_manifest import BuildManifest, SourceVersion
+from build_profile import BuildProfiler, StageTimer, count_nodes
+from htmlnode import HTMLNode
+from markdown_operations import (
+    MarkdownFormattingError,
+    blocks_to_html,
+    iter_blocks,
+    parse_document,
+    title_from_blocks,
+)
+from page_budget import PageBudget, PageBudgetExceeded
+from parse_cache import ParseCache, ParsedPage
+from template import load_template
+from tree_walk import walk_tree
 
-def copy_directory_contents(directory_to_search: str, destination_directory: str):
-    if not os.path.exists(directory_to_search):
-        raise Exception("Attempted to search directory that doesn't exist")
+# Pages submitted to the process pool ahead of the ones being generated,
+# per job, enough to keep every worker busy
+PENDING_PAGES_PER_JOB = 4
 
-    if os.path.exists(destination_directory):
-        print(f"Clearing destination directory '{destination_directory}' for new files")
-        shutil.rmtree(destination_directory)
 
-    print(f"Creating destination directory '{destination_directory}'")
-    os.mkdir(destination_directory)
+class GeneratedPage(NamedTuple):
+    """What generate_page reports about a page it wrote."""
 
-    directory_contents = os.listdir(directory_to_search)
-    for item in directory_contents:
-        item_path = os.path.join(directory_to_search, item)
-        if os.path.isfile(item_path):
-            print(f"Copying file '{item_path}, to '{destination_directory}'")
-            shutil.copy(item_path, destination_directory)
-        else:
-            new_destination_directory = os.path.join(destination_directory, item)
-            copy_directory_contents(item_path, new_destination_directory)
+    output_hash: str
+    # The Markdown the page was generated from, which may have changed
+    # on disk since
+    source: SourceVersion
+    profile: Optional[Dict]
 
 
-def generate_page(from_path: str, template_path: str, dest_path: str):
+def generate_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    profile: bool = False,
+    cache: Optional[ParseCache] = None,
+    block_cache: Optional[BlockCache] = None,
+    budget: Optional[PageBudget] = None,
+) -> GeneratedPage:
+    """Render the Markdown file at from_path into dest_path, and return
+    the hash of the page written.
+
+    With profile set, the page is timed stage by stage and a dict of its
+    statistics is returned as well. The page is streamed into dest_path
+    atomically, and not written at all if dest_path already holds the
+    same bytes.
+
+    With a cache, the rendered body and title are looked up by the
+    source's hash, and Markdown is only parsed on a miss.
+
+    Pages are rendered straight to HTML without an HTMLNode tree, except
+    with a block_cache, whose cached blocks are tree nodes; blocks
+    repeated across pages are then only rendered once. The profile only
+    has a node count when a tree was built.
+
+    With a budget, PageBudgetExceeded is raised if the page takes longer
+    or needs more memory than the budget allows."""
+
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open(from_path) as f:
-        markdown_file = f.read()
-    with open(template_path) as f:
-        template_file = f.read()
-    generated_page = markdown_to_html_node(markdown_file).to_html()
-    page_title = extract_title(markdown_file)
-    generated_file_with_title = template_file.replace("{{ Title }}", page_title)
-    generated_file_with_body = generated_file_with_title.replace(
-        "{{ Content }}", generated_page
-    )
+    timer = StageTimer()
+    args = (from_path, template_path, dest_path, profile, cache, block_cache, timer)
+    if budget is None:
+        return _generate_page(*args)
+    with budget.enforce(from_path, timer):
+        return _generate_page(*args)
+
+
+def _generate_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    profile: bool,
+    cache: Optional[ParseCache],
+    block_cache: Optional[BlockCache],
+    timer: StageTimer,
+) -> GeneratedPage:
+    with timer.stage("read"):
+        with open(from_path, "rb") as f:
+            # Taken before reading, so a later write changes the mtime
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        source = SourceVersion(
+            hashlib.sha256(data).hexdigest(), len(data), stat.st_mtime_ns
+        )
+        # Decoded as reading the file in text mode would
+        markdown_file = io.TextIOWrapper(io.BytesIO(data)).read()
+        template = load_template(template_path)
+    content: Union[str, HTMLNode]
+    cached = None
+    if block_cache is not None:
+        hits, misses = block_cache.hits, block_cache.misses
+    if cache is not None:
+        with timer.stage("cache"):
+            cache_key = cache.key(markdown_file.encode())
+            cached = cache.get(cache_key)
+    if cached is not None:
+        page_title, content = cached
+    else:
+        try:
+            if block_cache is None:
+                page_title, content = _render_markdown(markdown_file, timer)
+            else:
+                with timer.stage("parse"):
+                    document = parse_document(markdown_file, block_cache)
+                page_title, content = document.title, document.root
+        except MarkdownFormattingError as e:
+            e.source_path = from_path
+            raise
+    # Only a page parsed into a tree has nodes to count
+    page_node = content if isinstance(content, HTMLNode) else None
+    if cache is not None and cached is None:
+        if isinstance(content, HTMLNode):
+            with timer.stage("render"):
+                content = content.to_html()
+        cache.put(cache_key, ParsedPage(page_title, content))
     if not os.path.exists(os.path.dirname(dest_path)):
         os.makedirs(os.path.dirname(dest_path))
-    with open(dest_path, "x") as f:
-        f.write(generated_file_with_body)
+    values: Dict[str, Union[str, HTMLNode]] = {"Title": page_title, "Content": content}
+    if not profile:
+        with AtomicWriter(dest_path) as output:
+            template.render_to(output, values)
+            output.commit()
+        return GeneratedPage(output.hexdigest(), source, None)
+    if isinstance(content, HTMLNode):
+        with timer.stage("render"):
+            values["Content"] = content.to_html()
+    with AtomicWriter(dest_path) as output:
+        with timer.stage("template"):
+            template.render_to(output, values)
+        with timer.stage("write"):
+            output.commit()
+    page_profile = {
+        "source": from_path,
+        "dest": dest_path,
+        "seconds": timer.total(),
+        "stages": timer.stages,
+        "output_bytes": output.size,
+    }
+    if page_node is not None:
+        page_profile["nodes"] = count_nodes(page_node)
+    if block_cache is not None:
+        page_profile["block_hits"] = block_cache.hits - hits
+        page_profile["block_misses"] = block_cache.misses - misses
+    return GeneratedPage(output.hexdigest(), source, page_profile)
+
+
+def _render_markdown(markdown_file: str, timer: StageTimer) -> Tuple[str, str]:
+    """Return the title and body HTML of a Markdown file, rendered
+    without building an HTMLNode tree."""
+
+    with timer.stage("blocks"):
+        blocks = list(iter_blocks(markdown_file.split("\n")))
+    render_error = None
+    with timer.stage("render"):
+        try:
+            page_body = blocks_to_html(blocks)
+        except ValueError as e:
+            render_error = e
+    with timer.stage("title"):
+        page_title = title_from_blocks((block for block, _ in blocks), markdown_file)
+    # As with a tree, which is rendered last, a missing title comes first
+    if render_error is not None:
+        raise render_error
+    return page_title, page_body
 
 
 def generate_pages_recursive(
-    dir_path_content: str, template_path: str, dest_dir_path: str
-) -> None:
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    manifest: Optional[BuildManifest] = None,
+    jobs: int = 1,
+    profiler: Optional[BuildProfiler] = None,
+    cache: Optional[ParseCache] = None,
+    block_cache: Optional[BlockCache] = None,
+    budget: Optional[PageBudget] = None,
+) -> List[PageBudgetExceeded]:
+    """Generate an HTML page for every Markdown file under
+    dir_path_content. With a manifest, pages whose source is unchanged
+    since the last build are skipped.
+
+    With jobs greater than 1, pages are parsed and rendered in a pool of
+    that many worker processes while this process keeps walking the tree
+    and creating output directories. At most PENDING_PAGES_PER_JOB pages
+    per job are submitted ahead, so a large tree is never held in memory
+    as futures all at once.
+
+    With a profiler, every generated page is timed and recorded in it.
+    With a cache, pages whose Markdown was rendered before are not parsed
+    again, and with a block_cache, neither are blocks repeated across
+    pages. Each worker process keeps its own block cache.
+
+    With a budget, a page that exceeds it is reported and left out of the
+    manifest, so it is tried again by the next build, while the other
+    pages carry on. Returns the exceptions of the pages that did."""
+
     if not all(map(os.path.exists, (dir_path_content, template_path, dest_dir_path))):
         raise Exception("Attemped to search directory that doesn't exist")
-    directory_contents = os.listdir(dir_path_content)
-    for item in directory_contents:
-        item_path = os.path.join(dir_path_content, item)
-        dest_path = os.path.join(dest_dir_path, item)
-        if os.path.isfile(item_path):
-            dest_path = os.path.join(dest_dir_path, item.split(".")[0] + ".html")
-            generate_page(item_path, template_path, dest_path)
-        else:
-            os.mkdir(dest_path)
-            generate_pages_recursive(item_path, template_path, dest_path)
+    pages = find_pages(dir_path_content, dest_dir_path, manifest)
+    profile = profiler is not None
+    over_budget: List[PageBudgetExceeded] = []
+    if jobs <= 1:
+        for from_path, dest_path in pages:
+            try:
+                page = generate_page(
+                    from_path,
+                    template_path,
+                    dest_path,
+                    profile,
+                    cache,
+                    block_cache,
+                    budget,
+                )
+            except PageBudgetExceeded as e:
+                _page_over_budget(e, over_budget)
+                continue
+            _page_done(from_path, dest_path, page, manifest, profiler)
+        return over_budget
+
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    window = jobs * PENDING_PAGES_PER_JOB
+    pending: Dict["Future[GeneratedPage]", Tuple[str, str]] = {}
+    try:
+        while True:
+            for from_path, dest_path in islice(pages, window - len(pending)):
+                future = executor.submit(
+                    generate_page,
+                    from_path,
+                    template_path,
+                    dest_path,
+                    profile,
+                    cache,
+                    block_cache,
+                    budget,
+                )
+                pending[future] = (from_path, dest_path)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                from_path, dest_path = pending.pop(future)
+                try:
+                    page = future.result()
+                except PageBudgetExceeded as e:
+                    _page_over_budget(e, over_budget)
+                    continue
+                _page_done(from_path, dest_path, page, manifest, profiler)
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+    return over_budget
+
+
+def _page_over_budget(
+    error: PageBudgetExceeded, over_budget: List[PageBudgetExceeded]
+) -> None:
+    print(f"Page over budget: {error}")
+    over_budget.append(error)
+
+
+def _page_done(
+    from_path: str,
+    dest_path: str,
+    page: GeneratedPage,
+    manifest: Optional[BuildManifest],
+    profiler: Optional[BuildProfiler],
+) -> None:
+    """Record a generated page in the manifest and profiler, if any."""
+
+    if manifest is not None:
+        manifest.record(
+            from_path, dest_path, output_hash=page.output_hash, source=page.source
+        )
+    if profiler is not None and page.profile is not None:
+        profiler.record_page(page.profile)
+
+
+def find_pages(
+    dir_path_content: str,
+    dest_dir_path: str,
+    manifest: Optional[BuildManifest],
+    batch_size: int = 1000,
+) -> Iterator[Tuple[str, str]]:
+    """Yield (source, destination) pairs for every page that has to be
+    generated. With a manifest, pages that are up to date are left out.
+
+    Pages are yielded in batches of about batch_size, and the output
+    directories a batch needs are created just before it is yielded."""
+
+    pages: List[Tuple[str, str]] = []
+    directories: List[str] = []
+    for relative_dir, _, files in walk_tree(dir_path_content):
+        dest_directory = os.path.join(dest_dir_path, relative_dir)
+        directories.append(dest_directory)
+        for entry in files:
+            dest_path = page_destination(dest_directory, entry.name)
+            if manifest is not None and not manifest.needs_build(entry.path, dest_path):
+                continue
+            pages.append((entry.path, dest_path))
+        if len(pages) >= batch_size:
+            _make_directories(directories)
+            yield from pages
+            pages, directories = [], []
+    _make_directories(directories)
+    yield from pages
+
+
+def _make_directories(directories: List[str]) -> None:
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+
+
+def page_destination(dest_dir_path: str, markdown_name: str) -> str:
+    """Return the path of the HTML page generated from the Markdown file
+    named markdown_name, a path relative to the content directory."""
+
+    directory, name = os.path.split(markdown_name)
+    return os.path.join(dest_dir_path, directory, name.split(".")[0] + ".html")
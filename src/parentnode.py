@@ -1,25 +1,26 @@
-from typing import Dict, List, Optional
-from htmlnode import HTMLNode
+from typing import Mapping, Optional, Sequence
+from htmlnode import HTMLNode, Writer
 
 
 class ParentNode(HTMLNode):
     """An HTML node that has children, needed for recursion"""
 
+    __slots__ = ()
+
     def __init__(
         self,
-        children: List["HTMLNode"],
+        children: Sequence["HTMLNode"],
         tag: Optional[str] = None,
-        props: Dict[str, str] = {},
+        props: Optional[Mapping[str, str]] = None,
     ) -> None:
         super().__init__(tag=tag, children=children, props=props)
 
-    def to_html(self) -> str:
+    def render_to(self, write: Writer) -> None:
         if not self.tag:
             raise ValueError("ParentNode has no tag")
         if not self.children:
             raise ValueError("ParentNode has no children")
-        output = f"<{self.tag}{self.props_to_html()}>"
+        write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            output += child.to_html()
-        output += f"</{self.tag}>"
-        return output
+            child.render_to(write)
+        write(f"</{self.tag}>")
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import List, NamedTuple, Optional, Tuple
+
+from build_manifest import GENERATOR_VERSION
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class ParsedPage(NamedTuple):
+    """The parts of a page that depend only on its Markdown source."""
+
+    title: str
+    body: str
+
+
+class ParseCache:
+    """A directory of rendered page bodies and titles, addressed by a hash
+    of the Markdown source and the generator version.
+
+    Entries are written to a temporary file and renamed into place, so
+    several builders can share one directory: a reader only ever sees a
+    complete entry, and two writers of the same key write the same bytes.
+    Reading an entry touches it, and evict removes the least recently
+    used entries once the directory grows past max_bytes."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(source: bytes) -> str:
+        digest = hashlib.sha256(f"{GENERATOR_VERSION}\0".encode())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[ParsedPage]:
+        """Return the cached page for key, or None on a miss."""
+
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return ParsedPage(data["title"], data["body"])
+
+    def put(self, key: str, page: ParsedPage) -> None:
+        """Store page under key, replacing any existing entry."""
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(page._asdict(), f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits in
+        max_bytes. Returns the number of entries removed."""
+
+        entries: List[Tuple[int, int, str]] = []
+        total = 0
+        if not os.path.isdir(self.directory):
+            return 0
+        with os.scandir(self.directory) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as files:
+                    for entry in files:
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue  # Evicted by another builder
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                        total += stat.st_size
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
@@ -0,0 +1,104 @@
+import errno
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from build_manifest import BuildManifest
+from tree_walk import walk_tree
+
+# copy_file_range errors that mean "not possible here", rather than a real
+# I/O failure
+_NO_COPY_FILE_RANGE = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}
+
+
+def sync_file(source_path: str, dest_path: str, link: bool = False) -> None:
+    """Atomically replace dest_path with a copy of source_path.
+
+    With link, dest_path becomes a hard link to source_path when both are
+    on the same filesystem. Otherwise the data is copied with
+    os.copy_file_range, which lets the kernel copy (or reflink) it without
+    passing through Python, and falls back to shutil.copyfile. The copy
+    keeps the source's permissions and timestamps."""
+
+    directory, name = os.path.split(dest_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        if link:
+            try:
+                os.remove(temp_path)
+                os.link(source_path, temp_path)
+                os.replace(temp_path, dest_path)
+                return
+            except OSError:
+                pass  # Different filesystems, or links aren't supported
+        if not _copy_file_range(source_path, temp_path):
+            shutil.copyfile(source_path, temp_path)
+        shutil.copystat(source_path, temp_path)
+        os.replace(temp_path, dest_path)
+    except BaseException:
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _copy_file_range(source_path: str, dest_path: str) -> bool:
+    """Copy source_path to dest_path with os.copy_file_range. Returns
+    False, leaving dest_path to be overwritten, if it can't be used."""
+
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with open(source_path, "rb") as source, open(dest_path, "wb") as dest:
+        remaining = os.fstat(source.fileno()).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(source.fileno(), dest.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        except OSError as e:
+            if e.errno in _NO_COPY_FILE_RANGE:
+                return False
+            raise
+    return remaining <= 0
+
+
+def sync_directory(
+    source_dir: str,
+    dest_dir: str,
+    manifest: BuildManifest,
+    jobs: int = 1,
+    link: bool = False,
+) -> List[str]:
+    """Bring the files under dest_dir up to date with source_dir.
+
+    Only files that are new or changed since they were last recorded in
+    the manifest are copied, using jobs threads. Files whose source was
+    removed are deleted by the manifest's remove_stale_outputs at the end
+    of the build. Returns the destination paths that were written."""
+
+    if not os.path.exists(source_dir):
+        raise Exception("Attempted to search directory that doesn't exist")
+    os.makedirs(dest_dir, exist_ok=True)
+
+    pending: List[Tuple[str, str]] = []
+    total = 0
+    for relative_dir, _, files in walk_tree(source_dir):
+        total += len(files)
+        for entry in files:
+            dest_path = os.path.join(dest_dir, relative_dir, entry.name)
+            if manifest.needs_build(entry.path, dest_path, "asset"):
+                pending.append((entry.path, dest_path))
+
+    def sync(paths: Tuple[str, str]) -> None:
+        sync_file(paths[0], paths[1], link)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        list(executor.map(sync, pending))
+    for source_path, dest_path in pending:
+        manifest.record(source_path, dest_path, "asset")
+    print(f"Copied {len(pending)} of {total} static files to '{dest_dir}'")
+    return [dest_path for _, dest_path in pending]
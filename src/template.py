@@ -0,0 +1,82 @@
+import io
+import os
+import re
+from typing import Dict, List, Mapping, NamedTuple, Protocol, Tuple, Union
+
+from htmlnode import HTMLNode
+
+_SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+
+
+class TextOutput(Protocol):
+    """Anything templates can be written to, such as a text file."""
+
+    def write(self, text: str) -> object: ...
+
+
+class TemplateSegment(NamedTuple):
+    """A piece of a compiled template: literal text, or a named slot."""
+
+    text: str
+    slot: bool = False
+
+
+class Template:
+    """An HTML template compiled into literal text and {{ Name }} slots."""
+
+    def __init__(self, source: str) -> None:
+        self.segments: List[TemplateSegment] = []
+        position = 0
+        for match in _SLOT_PATTERN.finditer(source):
+            if match.start() > position:
+                self.segments.append(TemplateSegment(source[position : match.start()]))
+            self.segments.append(TemplateSegment(match.group(1), slot=True))
+            position = match.end()
+        if position < len(source):
+            self.segments.append(TemplateSegment(source[position:]))
+
+    def render_to(
+        self, output: TextOutput, values: Mapping[str, Union[str, HTMLNode]]
+    ) -> None:
+        """Write the template to output, filling each slot from values.
+
+        A slot filled with an HTMLNode is streamed straight into output.
+        Slots with no value are written back unchanged."""
+
+        for segment in self.segments:
+            if not segment.slot:
+                output.write(segment.text)
+            elif segment.text in values:
+                value = values[segment.text]
+                if isinstance(value, HTMLNode):
+                    value.render_to(output.write)
+                else:
+                    output.write(value)
+            else:
+                output.write(f"{{{{ {segment.text} }}}}")
+
+    def render(self, values: Mapping[str, Union[str, HTMLNode]]) -> str:
+        """Return the template as a string, filling each slot from values."""
+
+        output = io.StringIO()
+        self.render_to(output, values)
+        return output.getvalue()
+
+
+_template_cache: Dict[str, Tuple[int, int, Template]] = {}
+
+
+def load_template(template_path: str) -> Template:
+    """Return the compiled template at template_path.
+
+    Each template is read and compiled once per process, and compiled
+    again only if the file changes on disk."""
+
+    stat = os.stat(template_path)
+    cached = _template_cache.get(template_path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    with open(template_path) as f:
+        template = Template(f.read())
+    _template_cache[template_path] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
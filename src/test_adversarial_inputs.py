@@ -0,0 +1,81 @@
+import unittest
+
+from fixtures import assert_linear
+from markdown_operations import (
+    MarkdownFormattingError,
+    extract_markdown_images,
+    extract_markdown_links,
+    markdown_to_blocks,
+    markdown_to_html,
+    markdown_to_html_node,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import TextNode, TextNodeType
+
+# Each shape repeats a fragment that a backtracking or rescanning parser
+# handles in quadratic time
+SHAPES = {
+    "open brackets": lambda n: "[" * n,
+    "open image brackets": lambda n: "![" * n,
+    "labels without urls": lambda n: "[x]" * n,
+    "links without close": lambda n: "[x](" * n,
+    "images without close": lambda n: "![x](" * n,
+    "closed brackets": lambda n: "[x] (y) " * n,
+    "one link at the end": lambda n: "[" * n + "](/url)",
+    "one image at the end": lambda n: "![" * n + "](/url.png)",
+    "bold pairs": lambda n: "**a** " * n,
+    "italic pairs": lambda n: "*a* " * n,
+    "code spans": lambda n: "`a` " * n,
+    "links": lambda n: "[a](/b) " * n,
+    "stars and brackets": lambda n: "[*a* " * n,
+    "exclamation marks": lambda n: "!" * n,
+    "many blocks": lambda n: "text\n\n" * n,
+    "long list": lambda n: "".join(f"- item [{i}\n" for i in range(n)),
+}
+
+PARSERS = {
+    "text_to_textnodes": text_to_textnodes,
+    "markdown_to_html": markdown_to_html,
+    "markdown_to_html_node": lambda text: markdown_to_html_node(text).to_html(),
+    "markdown_to_blocks": markdown_to_blocks,
+    "extract_markdown_links": extract_markdown_links,
+    "extract_markdown_images": extract_markdown_images,
+    "split_nodes_link": lambda text: split_nodes_link([TextNode(text, TextNodeType.TEXT)]),
+    "split_nodes_image": lambda text: split_nodes_image(
+        [TextNode(text, TextNodeType.TEXT)]
+    ),
+}
+
+# Smallest input size of the doubling series each parser is timed on
+SIZE = 500
+
+
+def _parse(parser):
+    def run(text):
+        try:
+            parser(text)
+        except (MarkdownFormattingError, ValueError):
+            pass  # Rejecting the input quickly is fine too
+
+    return run
+
+
+class TestAdversarialInputs(unittest.TestCase):
+    def test_runtime_grows_linearly(self):
+        for shape_name, shape in SHAPES.items():
+            for parser_name, parser in PARSERS.items():
+                with self.subTest(shape=shape_name, parser=parser_name):
+                    assert_linear(self, _parse(parser), shape, SIZE)
+
+    def test_link_after_many_open_brackets(self):
+        self.assertEqual(
+            extract_markdown_links("[" * 1000 + "a](/url)"), [("[" * 999 + "a", "/url")]
+        )
+        nodes = text_to_textnodes("[" * 1000 + "a](/url)")
+        self.assertEqual(nodes, [TextNode("[" * 999 + "a", TextNodeType.LINK, "/url")])
+
+
+if __name__ == "__main__":
+    unittest.main()
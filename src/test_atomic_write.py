@@ -0,0 +1,101 @@
+import hashlib
+import os
+import stat
+import unittest
+
+from atomic_write import AtomicWriter, write_if_changed
+from fixtures import TempDirTestCase
+
+
+class TestWriteIfChanged(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, "index.html")
+
+    def _read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def test_writes_new_file(self):
+        self.assertTrue(write_if_changed(self.path, b"<p>hello</p>"))
+        self.assertEqual(self._read(), b"<p>hello</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_skips_identical_bytes(self):
+        write_if_changed(self.path, b"<p>hello</p>")
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(write_if_changed(self.path, b"<p>hello</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_replaces_changed_bytes(self):
+        write_if_changed(self.path, b"<p>hello</p>")
+        self.assertTrue(write_if_changed(self.path, b"<p>world</p>"))
+        self.assertEqual(self._read(), b"<p>world</p>")
+
+    def test_new_file_is_readable_by_others(self):
+        umask = os.umask(0o022)
+        self.addCleanup(os.umask, umask)
+        write_if_changed(self.path, b"<p>hello</p>")
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o644)
+
+
+class TestAtomicWriter(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.write("index.html", "<p>hello world</p>")
+        os.utime(self.path, ns=(0, 0))
+
+    def _stream(self, *chunks):
+        with AtomicWriter(self.path) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+            changed = writer.commit()
+        with open(self.path) as f:
+            return changed, f.read()
+
+    def test_same_text_in_chunks_is_not_written(self):
+        self.assertEqual(
+            self._stream("<p>hello ", "world", "</p>"), (False, "<p>hello world</p>")
+        )
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_changes_are_written(self):
+        for chunks in (
+            ("<p>hello there</p>",),
+            ("<p>hello", " world</p>", "<p>more</p>"),
+            ("<p>hello",),
+            ("",),
+        ):
+            with self.subTest(chunks):
+                self.assertEqual(self._stream(*chunks), (True, "".join(chunks)))
+                self._stream("<p>hello world</p>")
+
+    def test_long_text_is_compared_in_chunks(self):
+        text = "é" * 100_000
+        self.assertEqual(self._stream(text), (True, text))
+        self.assertEqual(self._stream(*text), (False, text))
+        changed = text[:-1] + "e"
+        self.assertEqual(self._stream(changed), (True, changed))
+
+    def test_size_and_hash(self):
+        with AtomicWriter(self.path) as writer:
+            writer.write("<p>é</p>")
+            writer.commit()
+        data = "<p>é</p>".encode()
+        self.assertEqual(writer.size, len(data))
+        self.assertEqual(writer.hexdigest(), hashlib.sha256(data).hexdigest())
+
+    def test_uncommitted_writes_are_discarded(self):
+        with self.assertRaises(RuntimeError):
+            with AtomicWriter(self.path) as writer:
+                writer.write("<p>half a page")
+                writer.write_bytes(b"")
+                raise RuntimeError
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>hello world</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
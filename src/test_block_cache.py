@@ -0,0 +1,49 @@
+import pickle
+import unittest
+
+from block_cache import BlockCache, process_block_cache
+from markdown_operations import markdown_to_html_node, parse_document
+
+NOTICE = "This page is part of [the guide](/guide), see **the index**."
+DOCUMENT = f"# Title\n\n{NOTICE}\n\n```\ncode = 1\n```\n\n{NOTICE}"
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_output_matches_uncached(self):
+        cache = BlockCache()
+        self.assertEqual(
+            markdown_to_html_node(DOCUMENT, cache).to_html(),
+            markdown_to_html_node(DOCUMENT).to_html(),
+        )
+
+    def test_counts_hits_and_misses(self):
+        cache = BlockCache()
+        markdown_to_html_node(DOCUMENT, cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        markdown_to_html_node(DOCUMENT, cache)
+        self.assertEqual(cache.stats(), {"hits": 5, "misses": 3, "entries": 3})
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(max_entries=2)
+        markdown_to_html_node("first\n\nsecond", cache)
+        markdown_to_html_node("first\n\nthird", cache)
+        self.assertEqual(len(cache), 2)
+        markdown_to_html_node("first", cache)
+        markdown_to_html_node("second", cache)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_cached_blocks_keep_their_links(self):
+        cache = BlockCache()
+        parse_document(DOCUMENT, cache)
+        document = parse_document(DOCUMENT, cache)
+        self.assertEqual(
+            document.links, [("the guide", "/guide"), ("the guide", "/guide")]
+        )
+
+    def test_unpickles_as_process_cache(self):
+        cache = BlockCache(max_entries=7)
+        self.assertIs(pickle.loads(pickle.dumps(cache)), process_block_cache(7))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -39,5 +39,15 @@ class TestBlockToBlockType(unittest.TestCase):
         expected = MarkdownBlockType.ORDERED_LIST
         self.assertEqual(block_to_block_type(block), expected)
 
+    def test_long_ol(self):
+        block = "\n".join(f"{i}. Item {i}" for i in range(1, 13))
+        expected = MarkdownBlockType.ORDERED_LIST
+        self.assertEqual(block_to_block_type(block), expected)
+
+    def test_ol_out_of_order(self):
+        block = "1. This is item one\n3. This is item three"
+        expected = MarkdownBlockType.PARAGRAPH
+        self.assertEqual(block_to_block_type(block), expected)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,101 @@
+import os
+import unittest
+from unittest import mock
+
+import build_manifest
+from build_manifest import BuildManifest, hash_file
+from fixtures import TempDirTestCase
+
+
+class TestBuildManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self.write("index.md", "# Title")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.dest = self.write("index.html", "<h1>Title</h1>")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+
+    def _built_manifest(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.use_template(self.template)
+        manifest.record(self.source, self.dest)
+        manifest.save()
+        loaded = BuildManifest.load(self.manifest_path)
+        loaded.use_template(self.template)
+        return loaded
+
+    def test_known_output_hashes_are_not_recomputed(self):
+        manifest = BuildManifest(self.manifest_path)
+        with mock.patch.object(build_manifest, "hash_file", wraps=hash_file) as hashed:
+            manifest.record(self.source, self.dest, output_hash="0" * 64)
+            asset = self.write("style.css", "p {}")
+            asset_dest = self.write("copy.css", "p {}")
+            manifest.record(asset, asset_dest, "asset")
+        self.assertEqual(
+            [call.args[0] for call in hashed.call_args_list], [self.source, asset]
+        )
+        self.assertEqual(manifest.outputs[self.dest]["output_hash"], "0" * 64)
+        self.assertEqual(
+            manifest.outputs[asset_dest]["output_hash"], hash_file(asset_dest)
+        )
+
+    def test_new_output_needs_build(self):
+        manifest = BuildManifest(self.manifest_path)
+        self.assertTrue(manifest.needs_build(self.source, self.dest))
+
+    def test_unchanged_source_is_skipped(self):
+        manifest = self._built_manifest()
+        self.assertFalse(manifest.needs_build(self.source, self.dest))
+
+    def test_changed_source_needs_build(self):
+        manifest = self._built_manifest()
+        self.write("index.md", "# A different title")
+        self.assertTrue(manifest.needs_build(self.source, self.dest))
+
+    def test_template_change_rebuilds_pages(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.use_template(self.template)
+        manifest.record(self.source, self.dest)
+        self.write("template.html", "<main>{{ Content }}</main>")
+        manifest.use_template(self.template)
+        self.assertTrue(manifest.needs_build(self.source, self.dest))
+
+    def test_template_change_keeps_removed_pages_stale(self):
+        manifest = self._built_manifest()
+        self.write("template.html", "<main>{{ Content }}</main>")
+        manifest.use_template(self.template)
+        os.remove(self.source)
+        self.assertEqual(manifest.remove_stale_outputs(), [self.dest])
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_stale_outputs_are_removed(self):
+        manifest = self._built_manifest()
+        self.assertEqual(manifest.remove_stale_outputs(), [self.dest])
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_changes_since_load(self):
+        manifest = self._built_manifest()
+        other = self.write("other.md", "# Other")
+        other_dest = self.write("other.html", "<h1>Other</h1>")
+        manifest.record(other, other_dest)
+        self.write("index.html", "<h1>New title</h1>")
+        manifest.record(self.source, self.dest)
+        self.assertEqual(
+            manifest.changes(),
+            {"added": [other_dest], "changed": [self.dest], "removed": []},
+        )
+
+    def test_unchanged_output_is_not_a_change(self):
+        manifest = self._built_manifest()
+        manifest.record(self.source, self.dest)
+        self.assertEqual(
+            manifest.changes(), {"added": [], "changed": [], "removed": []}
+        )
+
+    def test_removed_output_is_a_change(self):
+        manifest = self._built_manifest()
+        manifest.remove_stale_outputs()
+        self.assertEqual(manifest.changes()["removed"], [self.dest])
+
+if __name__ == "__main__":
+    unittest.main()
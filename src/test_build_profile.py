@@ -0,0 +1,58 @@
+import unittest
+
+from build_profile import BuildProfiler, count_nodes, percentile
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+
+def page(source, seconds):
+    return {
+        "source": source,
+        "dest": source.replace(".md", ".html"),
+        "seconds": seconds,
+        "stages": {"inline": seconds / 2, "write": seconds / 2},
+        "nodes": 3,
+        "output_bytes": 100,
+    }
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_count_nodes(self):
+        tree = ParentNode([ParentNode([LeafNode("a")], "p"), LeafNode("b", "p")], "div")
+        self.assertEqual(count_nodes(tree), 4)
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 50.0)
+        self.assertEqual(percentile(values, 0.99), 99.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_report(self):
+        profiler = BuildProfiler()
+        for i in range(1, 5):
+            profiler.record_page(page(f"page{i}.md", float(i)))
+        report = profiler.report(slowest=2)
+        self.assertEqual(report["pages"], 4)
+        self.assertEqual(report["page_seconds"]["total"], 10.0)
+        self.assertEqual(report["stages"]["write"]["max"], 2.0)
+        self.assertEqual(report["output_bytes"], 400)
+        self.assertEqual([p["source"] for p in report["slowest"]], ["page4.md", "page3.md"])
+        self.assertEqual(report["nodes"], 12)
+
+    def test_report_without_trees_has_no_node_count(self):
+        profiler = BuildProfiler()
+        record = page("index.md", 1.0)
+        del record["nodes"]
+        profiler.record_page(record)
+        self.assertNotIn("nodes", profiler.report())
+
+    def test_hooks_receive_events(self):
+        events = []
+        profiler = BuildProfiler(hooks=[events.append])
+        profiler.record_page(page("index.md", 1.0))
+        profiler.finish()
+        self.assertEqual([event["event"] for event in events], ["page", "build"])
+        self.assertEqual(events[0]["source"], "index.md")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -40,5 +40,10 @@ class TestExtractMarkdownFromLinks(unittest.TestCase):
         expected = [("this", "https://image.com/image.png")]
         self.assertEqual(extract_markdown_links(input), expected)
 
+    def test_several_images_ignored(self):
+        input = "![one](a.png) [first](/a) ![two](b.png) [second](/b) ![three](c.png)"
+        expected = [("first", "/a"), ("second", "/b")]
+        self.assertEqual(extract_markdown_links(input), expected)
+
 if __name__ == "__main__":
     unittest.main()
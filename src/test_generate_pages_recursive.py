@@ -0,0 +1,94 @@
+import os
+import unittest
+from unittest import mock
+
+from block_cache import BlockCache
+from build_profile import BuildProfiler
+from fixtures import TempDirTestCase
+from markdown_operations import MarkdownFormattingError
+import page_generator
+from page_generator import generate_pages_recursive
+
+PAGES = {
+    "index.md": "# Home\n\nSome **bold** text and a [link](/about).",
+    "about/index.md": "# About\n\n* One\n* Two",
+    "blog/post/index.md": "# Post\n\n```\ncode\n```",
+}
+
+
+class TestGeneratePagesRecursive(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        for name, text in PAGES.items():
+            self.write(os.path.join(self.content, name), text)
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def _build(self, name, jobs):
+        dest = os.path.join(self.tmp.name, name)
+        os.mkdir(dest)
+        generate_pages_recursive(self.content, self.template, dest, jobs=jobs)
+        outputs = {}
+        for root, _, files in os.walk(dest):
+            for file in files:
+                path = os.path.join(root, file)
+                with open(path, "rb") as f:
+                    outputs[os.path.relpath(path, dest)] = f.read()
+        return outputs
+
+    def test_parallel_output_matches_serial(self):
+        serial = self._build("serial", jobs=1)
+        parallel = self._build("parallel", jobs=2)
+        self.assertEqual(len(serial), len(PAGES))
+        self.assertEqual(serial, parallel)
+
+    def test_parallel_error_names_source(self):
+        broken = os.path.join(self.content, "about", "index.md")
+        self.write(broken, "No title here")
+        with self.assertRaises(MarkdownFormattingError) as context:
+            self._build("parallel", jobs=2)
+        self.assertEqual(context.exception.source_path, broken)
+        self.assertIn(broken, str(context.exception))
+
+    def test_profile_counts_nodes_only_for_trees(self):
+        for name, block_cache in (("direct", None), ("tree", BlockCache())):
+            with self.subTest(name):
+                dest = os.path.join(self.tmp.name, name)
+                os.mkdir(dest)
+                profiler = BuildProfiler()
+                generate_pages_recursive(
+                    self.content,
+                    self.template,
+                    dest,
+                    profiler=profiler,
+                    block_cache=block_cache,
+                )
+                counted = ["nodes" in page for page in profiler.pages]
+                self.assertEqual(counted, [block_cache is not None] * len(PAGES))
+                self.assertEqual("nodes" in profiler.report(), block_cache is not None)
+
+    def test_parallel_submits_a_bounded_window(self):
+        for n in range(40):
+            self.write(os.path.join(self.content, f"many/{n}.md"), f"# Page {n}")
+        find_pages, page_done = page_generator.find_pages, page_generator._page_done
+        pulled, finished, ahead = [0], [0], []
+
+        def counting_find_pages(*args):
+            for page in find_pages(*args):
+                pulled[0] += 1
+                ahead.append(pulled[0] - finished[0])
+                yield page
+
+        def counting_page_done(*args):
+            finished[0] += 1
+            page_done(*args)
+
+        with mock.patch.object(page_generator, "find_pages", counting_find_pages):
+            with mock.patch.object(page_generator, "_page_done", counting_page_done):
+                outputs = self._build("parallel", jobs=2)
+        self.assertEqual(len(outputs), len(PAGES) + 40)
+        self.assertLessEqual(max(ahead), 2 * page_generator.PENDING_PAGES_PER_JOB)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -26,5 +26,10 @@ class TestHTMLNode(unittest.TestCase):
         node2 = HTMLNode("a", "Click this link", [], {"href": "https://google.com"})
         self.assertEqual(node, node2)
 
+    def test_to_html_not_implemented(self):
+        node = HTMLNode("p", "value")
+        with self.assertRaises(NotImplementedError):
+            node.to_html()
+
 if __name__ == "__main__":
     unittest.main()
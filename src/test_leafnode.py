@@ -22,3 +22,12 @@ class TestLeafNode(unittest.TestCase):
         )
         expected = '<a href="https://google.com">Click me!</a>'
         self.assertEqual(node.to_html(), expected)
+
+    def test_leaves_share_empty_children_and_props(self):
+        node = LeafNode("One")
+        node2 = LeafNode("Two", "b")
+        self.assertIs(node.children, node2.children)
+        self.assertIs(node.props, node2.props)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(TypeError):
+            node.props["href"] = "https://google.com"
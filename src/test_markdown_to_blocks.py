@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from markdown_operations import markdown_to_blocks
+from markdown_operations import MarkdownBlockType, iter_blocks, markdown_to_blocks
 
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_expected_1(self):
@@ -26,6 +27,36 @@ class TestMarkdownToBlocks(unittest.TestCase):
         expected = ["This is just one paragraph"]
         self.assertEqual(markdown_to_blocks(markdown), expected)
 
+    def test_fenced_code_keeps_blank_lines(self):
+        markdown = "Intro\n\n```\nfirst()\n\nsecond()\n```\n\nOutro"
+        expected = ["Intro", "```\nfirst()\n\nsecond()\n```", "Outro"]
+        self.assertEqual(markdown_to_blocks(markdown), expected)
+
+    def test_heading_is_own_block(self):
+        markdown = "# Title\nText right under the title\n\n\n\nMore text"
+        expected = ["# Title", "Text right under the title", "More text"]
+        self.assertEqual(markdown_to_blocks(markdown), expected)
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_reads_lines_from_file(self):
+        document = io.StringIO("## Steps\n\n1. One\n2. Two\n\n> Quote\n")
+        expected = [
+            ("## Steps", MarkdownBlockType.HEADING),
+            ("1. One\n2. Two", MarkdownBlockType.ORDERED_LIST),
+            ("> Quote", MarkdownBlockType.QUOTE),
+        ]
+        self.assertEqual(list(iter_blocks(document)), expected)
+
+    def test_empty_heading_is_paragraph(self):
+        document = io.StringIO("# Title\n\n# \n\n#\t\n")
+        expected = [
+            ("# Title", MarkdownBlockType.HEADING),
+            ("#", MarkdownBlockType.PARAGRAPH),
+            ("#", MarkdownBlockType.PARAGRAPH),
+        ]
+        self.assertEqual(list(iter_blocks(document)), expected)
+
 
 if __name__ == "__main__":
     unittest.main()
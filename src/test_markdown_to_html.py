@@ -0,0 +1,75 @@
+import os
+import unittest
+
+from block_cache import BlockCache
+from markdown_operations import (
+    MarkdownFormattingError,
+    markdown_to_html,
+    markdown_to_html_node,
+)
+
+CONTENT_DIR = os.path.join(os.path.dirname(__file__), "..", "content")
+
+DOCUMENTS = [
+    "# My Website\n\nThis is my website! Here you will find:\n\n* Nothing\n* Because this is fake",
+    "## **Bold heading**\n\n### Mixed *heading* text",
+    "```\nprint(\"Hello, World!\")\n\nprint(\"again\")\n```\n\n> Bruh\n> moment",
+    "1. **bold item**\n2. item with [a link](/to) and `code`\n3. [**nested** label](/nested)",
+    "- one\n* two ![img](/i.png)",
+    "[Just a link](/alone)\n\n![Just an image](/alone.png)\n\n**just bold**",
+    "A paragraph with *italic*, **bold**, `code`,\n[a link](/x) and ![an image](/y.png).",
+    "Unmatched [brackets and ] a ( stray paren",
+]
+
+
+class TestMarkdownToHTML(unittest.TestCase):
+    def test_matches_tree(self):
+        for markdown in DOCUMENTS:
+            with self.subTest(markdown=markdown):
+                self.assertEqual(
+                    markdown_to_html(markdown), markdown_to_html_node(markdown).to_html()
+                )
+
+    def test_matches_tree_for_site_content(self):
+        for path, _, names in os.walk(CONTENT_DIR):
+            for name in names:
+                with open(os.path.join(path, name)) as f:
+                    markdown = f.read()
+                with self.subTest(name=name):
+                    self.assertEqual(
+                        markdown_to_html(markdown),
+                        markdown_to_html_node(markdown).to_html(),
+                    )
+
+    def test_accepts_lines(self):
+        self.assertEqual(
+            markdown_to_html(["# Title", "", "Text"]), "<div><h1>Title</h1><p>Text</p></div>"
+        )
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(MarkdownFormattingError):
+            markdown_to_html("Some **bold")
+
+    def test_parse_error_comes_before_render_error(self):
+        markdown = "- \n\nSome **bold"
+        with self.assertRaises(MarkdownFormattingError):
+            markdown_to_html_node(markdown).to_html()
+        with self.assertRaises(MarkdownFormattingError):
+            markdown_to_html(markdown)
+
+    def test_cached_parse_error_comes_before_render_error(self):
+        markdown = "# T\n\n>\n\nan *unclosed"
+        with self.assertRaises(MarkdownFormattingError):
+            markdown_to_html_node(markdown, BlockCache(10)).to_html()
+        with self.assertRaises(ValueError):
+            markdown_to_html_node("# T\n\n>", BlockCache(10)).to_html()
+
+    def test_empty_list_item(self):
+        with self.assertRaises(ValueError):
+            markdown_to_html("- ")
+        with self.assertRaises(ValueError):
+            markdown_to_html_node("- ").to_html()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,6 +21,11 @@ class TestMarkdownToHTMLNode(unittest.TestCase):
         )
         self.assertEqual(markdown_to_html_node(markdown), expected)
 
+    def test_heading_marker_with_trailing_space(self):
+        markdown = "# Title\n\n# "
+        expected = ParentNode([LeafNode("Title", "h1"), LeafNode("#", "p")], "div")
+        self.assertEqual(markdown_to_html_node(markdown), expected)
+
     def test_expected_2(self):
         markdown = "## Trying to include everything\n\nThis is an attempt to include everything. For example, some code:\n\n```\nprint(\"Hello, World!\")\n```\n\nHere's a quote:\n\n> Bruh\n\nHere's a list of reasons why this works:\n\n1. I am cool\n2. Profit\n\n And that's that."
         expected = ParentNode(
@@ -33,5 +33,10 @@ class TestOrderedListToHTMLNode(unittest.TestCase):
         )
         self.assertEqual(_ordered_list_to_html_node(block), expected)
 
+    def test_double_digit_items(self):
+        block = "\n".join(f"{i}. Item {i}" for i in range(1, 11))
+        expected = ParentNode([LeafNode(f"Item {i}", "li") for i in range(1, 11)], "ol")
+        self.assertEqual(_ordered_list_to_html_node(block), expected)
+
 if __name__ == "__main__":
     unittest.main()
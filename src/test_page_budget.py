@@ -0,0 +1,100 @@
+import os
+import pickle
+import time
+import unittest
+
+from build_manifest import BuildManifest
+from build_profile import StageTimer
+from fixtures import TempDirTestCase
+from page_budget import PageBudget, PageBudgetExceeded
+from page_generator import generate_pages_recursive
+
+MB = 1024 * 1024
+# Several times the memory budget once parsed and rendered
+LARGE_PAGE = "# Large\n\n" + "Some **bold** text and a [link](/about).\n\n" * 200000
+
+
+class TestPageBudget(unittest.TestCase):
+    def test_time_budget_names_stage(self):
+        timer = StageTimer()
+        with self.assertRaises(PageBudgetExceeded) as context:
+            with PageBudget(seconds=0.05).enforce("slow.md", timer):
+                with timer.stage("render"):
+                    time.sleep(5)
+        error = context.exception
+        self.assertEqual(
+            (error.source_path, error.resource_name, error.stage),
+            ("slow.md", "time", "render"),
+        )
+
+    def test_memory_budget(self):
+        timer = StageTimer()
+        with self.assertRaises(PageBudgetExceeded) as context:
+            with PageBudget(memory_bytes=16 * MB).enforce("big.md", timer):
+                with timer.stage("parse"):
+                    bytearray(256 * MB)
+        self.assertEqual(context.exception.resource_name, "memory")
+        self.assertEqual(context.exception.stage, "parse")
+        # The limit is lifted again afterwards
+        bytearray(256 * MB)
+
+    def test_within_budget(self):
+        timer = StageTimer()
+        with PageBudget(seconds=5, memory_bytes=64 * MB).enforce("ok.md", timer):
+            with timer.stage("parse"):
+                pass
+        self.assertEqual(timer.current, "parse")
+
+    def test_exception_pickles(self):
+        error = pickle.loads(
+            pickle.dumps(PageBudgetExceeded("a.md", "time", 1.5, "render"))
+        )
+        self.assertEqual(
+            str(error), "a.md: exceeded the 1.5 s time budget during the render stage"
+        )
+
+
+class TestBuildWithBudget(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.large = self.write("content/large/index.md", LARGE_PAGE)
+        self.write("content/index.md", "# Home\n\nSome text.")
+        self.write("content/about/index.md", "# About\n\n* One\n* Two")
+        self.template = self.write(
+            "template.html", "<title>{{ Title }}</title>{{ Content }}"
+        )
+
+    def _build(self, jobs):
+        dest = os.path.join(self.tmp.name, f"public{jobs}")
+        os.mkdir(dest)
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        over_budget = generate_pages_recursive(
+            self.content,
+            self.template,
+            dest,
+            manifest,
+            jobs,
+            budget=PageBudget(memory_bytes=16 * MB),
+        )
+        return dest, manifest, over_budget
+
+    def test_other_pages_are_built(self):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                dest, manifest, over_budget = self._build(jobs)
+                self.assertEqual([e.source_path for e in over_budget], [self.large])
+                self.assertTrue(os.path.exists(os.path.join(dest, "index.html")))
+                self.assertTrue(
+                    os.path.exists(os.path.join(dest, "about", "index.html"))
+                )
+                self.assertFalse(
+                    os.path.exists(os.path.join(dest, "large", "index.html"))
+                )
+                self.assertNotIn(
+                    os.path.join(dest, "large", "index.html"), manifest.outputs
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
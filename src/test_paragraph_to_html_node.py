@@ -27,6 +27,30 @@ class TestParagraphToHTMLNode(unittest.TestCase):
         )
         self.assertEqual(_paragraph_to_html_node(block), expected)
 
+    def test_link_inside_bold(self):
+        self.assertEqual(
+            _paragraph_to_html_node("**[Download](/dl)**").to_html(),
+            '<p><b><a href="/dl">Download</a></b></p>',
+        )
+
+    def test_link_inside_italic(self):
+        self.assertEqual(
+            _paragraph_to_html_node("*see [docs](/d)*").to_html(),
+            '<p><i>see <a href="/d">docs</a></i></p>',
+        )
+
+    def test_code_span_crossing_link(self):
+        self.assertEqual(
+            _paragraph_to_html_node("see [x `](y)` z").to_html(),
+            "<p>see [x <code>](y)</code> z</p>",
+        )
+
+    def test_only_a_link_with_bold_text(self):
+        self.assertEqual(
+            _paragraph_to_html_node("[**bold** link](u)").to_html(),
+            '<p><a href="u"><b>bold</b> link</a></p>',
+        )
+
     def test_inline_link(self):
         block = "This is a paragraph with a [link](https://google.com) to google."
         expected = ParentNode(
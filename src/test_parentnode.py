@@ -80,5 +80,18 @@ class TestParentNode(unittest.TestCase):
         )
         self.assertEqual(node.to_html(), expected)
 
+    def test_render_to_streams_chunks(self):
+        node = ParentNode(
+            tag="div",
+            children=[
+                ParentNode(tag="p", children=[LeafNode(tag="b", value="Bold")]),
+                LeafNode(value="text"),
+            ],
+        )
+        chunks = []
+        node.render_to(chunks.append)
+        self.assertEqual(chunks, ["<div>", "<p>", "<b>Bold</b>", "</p>", "text", "</div>"])
+        self.assertEqual("".join(chunks), node.to_html())
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,57 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from fixtures import TempDirTestCase
+from page_generator import generate_page
+from parse_cache import ParseCache, ParsedPage
+
+
+class TestParseCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = ParseCache(os.path.join(self.tmp.name, "cache"))
+
+    def test_round_trip(self):
+        key = ParseCache.key(b"# Title")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, ParsedPage("Title", "<div><h1>Title</h1></div>"))
+        self.assertEqual(
+            self.cache.get(key), ParsedPage("Title", "<div><h1>Title</h1></div>")
+        )
+
+    def test_key_depends_on_source(self):
+        self.assertNotEqual(ParseCache.key(b"# One"), ParseCache.key(b"# Two"))
+
+    def test_evicts_least_recently_used(self):
+        keys = [ParseCache.key(str(i).encode()) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, ParsedPage("Title", "x" * 100))
+            path = self.cache._path(key)
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        self.cache.get(keys[0])  # Now the most recently used
+        self.cache.max_bytes = 2 * os.path.getsize(self.cache._path(keys[0]))
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_generate_page_uses_cache(self):
+        source = self.write("index.md", "# Title\n\nSome *text*")
+        template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        dest = os.path.join(self.tmp.name, "index.html")
+        with redirect_stdout(StringIO()):
+            generate_page(source, template, dest)
+            uncached = self.read(dest)
+            generate_page(source, template, dest, cache=self.cache)
+            self.assertEqual(self.read(dest), uncached)
+
+            key = ParseCache.key("# Title\n\nSome *text*".encode())
+            self.cache.put(key, ParsedPage("Cached", "<p>cached</p>"))
+            generate_page(source, template, dest, cache=self.cache)
+        self.assertEqual(self.read(dest), "<title>Cached</title><p>cached</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from markdown_operations import (
+    Heading,
+    MarkdownFormattingError,
+    markdown_to_html_node,
+    parse_document,
+)
+
+class TestParseDocument(unittest.TestCase):
+    markdown = (
+        "# My Website\n\n"
+        "Read the [docs](/docs) and see ![a cat](/cat.png).\n\n"
+        "## Links\n\n"
+        "* [Home](/) and [**bold** link](/bold)\n"
+        "* Nothing here\n\n"
+        "```\n# not a heading [nor](/a-link)\n```"
+    )
+
+    def test_tree_matches_markdown_to_html_node(self):
+        document = parse_document(self.markdown)
+        self.assertEqual(
+            document.root.to_html(), markdown_to_html_node(self.markdown).to_html()
+        )
+
+    def test_title_and_outline(self):
+        document = parse_document(self.markdown)
+        self.assertEqual(document.title, "My Website")
+        self.assertEqual(
+            document.headings, [Heading(1, "My Website"), Heading(2, "Links")]
+        )
+
+    def test_links_and_images(self):
+        document = parse_document(self.markdown)
+        self.assertEqual(
+            document.links, [("docs", "/docs"), ("Home", "/"), ("bold link", "/bold")]
+        )
+        self.assertEqual(document.images, [("a cat", "/cat.png")])
+
+    def test_accepts_lines(self):
+        lines = self.markdown.split("\n")
+        self.assertEqual(parse_document(lines).title, "My Website")
+
+    def test_no_title(self):
+        with self.assertRaises(MarkdownFormattingError):
+            parse_document("Just a paragraph.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import gzip
+import lzma
+import os
+import unittest
+from unittest import mock
+
+from fixtures import TempDirTestCase
+from precompress import precompress_directory, precompress_file, refresh_siblings
+
+PAGE = "<p>" + "Tolkien's Middle-earth is a realm of breathtaking diversity. " * 20 + "</p>"
+
+
+class TestPrecompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.write("index.html", PAGE)
+
+    def test_writes_gzip_sibling(self):
+        written = precompress_file(self.page)
+        self.assertEqual(written, [self.page + ".gz"])
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()).decode(), PAGE)
+
+    def test_xz_only_on_request(self):
+        written = precompress_file(self.page, (".gz", ".xz"))
+        self.assertEqual(written, [self.page + ".gz", self.page + ".xz"])
+        with open(self.page + ".xz", "rb") as f:
+            self.assertEqual(lzma.decompress(f.read()).decode(), PAGE)
+
+    def test_sibling_keeps_source_mode(self):
+        os.chmod(self.page, 0o640)
+        precompress_file(self.page)
+        self.assertEqual(os.stat(self.page + ".gz").st_mode & 0o777, 0o640)
+
+    def test_temp_file_removed_on_error(self):
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                precompress_file(self.page)
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_up_to_date_siblings_are_skipped(self):
+        precompress_file(self.page)
+        self.assertEqual(precompress_file(self.page), [])
+        self.write("index.html", PAGE + "<p>More</p>")
+        self.assertEqual(len(precompress_file(self.page)), 1)
+
+    def test_small_and_binary_files_are_skipped(self):
+        self.write("small.css", "p {}")
+        self.write("image.png", PAGE)
+        written = precompress_directory(self.tmp.name)
+        self.assertEqual(written, [self.page + ".gz"])
+
+    def test_orphaned_siblings_are_removed(self):
+        precompress_directory(self.tmp.name)
+        os.remove(self.page)
+        precompress_directory(self.tmp.name, jobs=2)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_unselected_siblings_are_removed(self):
+        precompress_directory(self.tmp.name, suffixes=(".gz", ".xz"))
+        precompress_directory(self.tmp.name)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["index.html", "index.html.gz"])
+
+    def test_compressed_outputs_are_kept(self):
+        archive = self.write("static/dl/archive.tar.gz", gzip.compress(b"tar" * 100))
+        script = self.write("app.js", PAGE)
+        shipped = self.write("app.js.gz", "shipped with the site")
+        outputs = {self.page, archive, script, shipped}
+        for expected in ([self.page + ".gz"], []):
+            written = precompress_directory(self.tmp.name, outputs=outputs)
+            self.assertEqual(written, expected)
+            self.assertTrue(os.path.exists(archive))
+            self.assertEqual(self.read("app.js.gz"), "shipped with the site")
+        self.assertEqual(refresh_siblings(script, outputs=outputs), [])
+        os.remove(script)
+        refresh_siblings(script, outputs=outputs)
+        self.assertEqual(self.read("app.js.gz"), "shipped with the site")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,317 @@
+import gzip
+import http.client
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+
+from fixtures import TempDirTestCase
+
+# server.py lives next to src/ rather than in it
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+
+import server  # noqa: E402
+
+PAGE = b"<html><body>" + b"page " * 100 + b"</body></html>"
+
+
+class QuietHandler(server.KeepAliveHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class ServerTestCase(TempDirTestCase):
+    """Serves a temporary directory holding index.html on a free port."""
+
+    workers = 4
+
+    def setUp(self):
+        super().setUp()
+        self.write("index.html", PAGE)
+        self.httpd = server.PooledHTTPServer(
+            ("localhost", 0),
+            lambda *args: QuietHandler(*args, directory=self.tmp.name),
+            self.workers,
+        )
+        thread = threading.Thread(
+            target=self.httpd.serve_forever, args=(0.05,), daemon=True
+        )
+        thread.start()
+        self.addCleanup(self.httpd.server_close)
+        self.addCleanup(self.httpd.shutdown)
+        self.port = self.httpd.server_address[1]
+
+    def connect(self):
+        connection = http.client.HTTPConnection("localhost", self.port, timeout=5)
+        self.addCleanup(connection.close)
+        return connection
+
+    def get(self, path="/index.html", headers=None, connection=None):
+        connection = connection or self.connect()
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        return response, response.read()
+
+
+class TestKeepAlive(ServerTestCase):
+    workers = 2
+
+    def test_idle_connections_hold_no_worker(self):
+        idle = [self.connect() for _ in range(self.workers)]
+        for connection in idle:
+            response, body = self.get(connection=connection)
+            self.assertEqual((response.status, body), (200, PAGE))
+        start = time.perf_counter()
+        response, body = self.get()
+        self.assertEqual((response.status, body), (200, PAGE))
+        self.assertLess(time.perf_counter() - start, 2)
+        # The idle connections are still open and usable
+        for connection in idle:
+            response, body = self.get(connection=connection)
+            self.assertEqual(response.status, 200)
+
+    def test_pipelined_requests(self):
+        with socket.create_connection(("localhost", self.port), timeout=5) as sock:
+            request = b"GET /index.html HTTP/1.1\r\nHost: localhost\r\n\r\n"
+            sock.sendall(request * 2)
+            received = b""
+            while received.count(PAGE) < 2:
+                chunk = sock.recv(65536)
+                self.assertTrue(chunk)
+                received += chunk
+        self.assertEqual(received.count(b"HTTP/1.1 200"), 2)
+
+    def test_idle_timeout_closes_connection(self):
+        self.httpd.idle_timeout = 0.2
+        with socket.create_connection(("localhost", self.port), timeout=5) as sock:
+            self.assertEqual(sock.recv(1), b"")
+
+    def test_server_close_closes_idle_connections(self):
+        connection = self.connect()
+        self.get(connection=connection)
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.assertEqual(connection.sock.recv(1), b"")
+
+
+class TestFileCache(TempDirTestCase):
+    def test_hit_returns_same_entry(self):
+        cache = server.FileCache()
+        path = self.write("a.html", b"hello")
+        entry = cache.get(path)
+        self.assertEqual(entry.body, b"hello")
+        self.assertIs(cache.get(path), entry)
+
+    def test_rewritten_file_is_reread(self):
+        cache = server.FileCache()
+        path = self.write("a.html", b"old")
+        old = cache.get(path)
+        # Replaced the way builds write files, keeping size and mtime
+        temp_path = self.write("a.html.tmp", b"new")
+        stat = os.stat(path)
+        os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(temp_path, path)
+        new = cache.get(path)
+        self.assertEqual(new.body, b"new")
+        self.assertNotEqual(new.etag, old.etag)
+
+    def test_etag_depends_on_contents(self):
+        cache = server.FileCache()
+        first = cache.get(self.write("a.html", b"same"))
+        second = cache.get(self.write("b.html", b"same"))
+        third = cache.get(self.write("c.html", b"other"))
+        self.assertEqual(first.etag, second.etag)
+        self.assertNotEqual(first.etag, third.etag)
+
+    def test_large_files_are_not_cached(self):
+        cache = server.FileCache(max_file_bytes=4)
+        self.assertIsNone(cache.get(self.write("big.bin", b"12345")))
+
+    def test_evicts_least_recently_used(self):
+        cache = server.FileCache(max_bytes=10)
+        a = self.write("a", b"aaaa")
+        b = self.write("b", b"bbbb")
+        entry_a = cache.get(a)
+        cache.get(b)
+        cache.get(a)  # Now b is the least recently used
+        cache.get(self.write("c", b"cccc"))
+        self.assertIs(cache.get(a), entry_a)
+        self.assertEqual(len(cache._entries), 2)
+        self.assertNotIn(b, cache._entries)
+
+
+class TestConditionalRequests(ServerTestCase):
+    def test_etag_match_is_not_modified(self):
+        response, _ = self.get()
+        etag = response.getheader("ETag")
+        self.assertTrue(etag.startswith('"'))
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            with self.subTest(header):
+                response, body = self.get(headers={"If-None-Match": header})
+                self.assertEqual((response.status, body), (304, b""))
+                self.assertEqual(response.getheader("ETag"), etag)
+
+    def test_etag_mismatch_sends_body(self):
+        response, body = self.get(headers={"If-None-Match": '"other"'})
+        self.assertEqual((response.status, body), (200, PAGE))
+
+    def test_if_modified_since(self):
+        self.write("index.html", PAGE, mtime=1_000_000_000)
+        response, body = self.get(
+            headers={"If-Modified-Since": "Sun, 09 Sep 2001 01:46:40 GMT"}
+        )
+        self.assertEqual((response.status, body), (304, b""))
+        response, body = self.get(
+            headers={"If-Modified-Since": "Sun, 09 Sep 2001 01:46:39 GMT"}
+        )
+        self.assertEqual((response.status, body), (200, PAGE))
+
+    def test_if_none_match_wins_over_if_modified_since(self):
+        self.write("index.html", PAGE, mtime=1_000_000_000)
+        response, _ = self.get(
+            headers={
+                "If-None-Match": '"other"',
+                "If-Modified-Since": "Sun, 09 Sep 2001 01:46:40 GMT",
+            }
+        )
+        self.assertEqual(response.status, 200)
+
+    def test_uncached_file_has_validators(self):
+        self.httpd.file_cache = None
+        response, body = self.get()
+        self.assertEqual((response.status, body), (200, PAGE))
+        etag = response.getheader("ETag")
+        response, _ = self.get(headers={"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+
+
+class TestRanges(ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data = bytes(range(256)) * 8
+        self.write("data.bin", self.data)
+
+    def get_range(self, value, **headers):
+        return self.get("/data.bin", headers={"Range": value, **headers})
+
+    def test_ranges(self):
+        size = len(self.data)
+        for value, first, last in (
+            ("bytes=0-9", 0, 9),
+            ("bytes=100-", 100, size - 1),
+            ("bytes=-5", size - 5, size - 1),
+            ("bytes=-99999", 0, size - 1),
+            ("bytes=2000-99999", 2000, size - 1),
+        ):
+            with self.subTest(value):
+                response, body = self.get_range(value)
+                self.assertEqual(response.status, 206)
+                self.assertEqual(body, self.data[first : last + 1])
+                self.assertEqual(
+                    response.getheader("Content-Range"), f"bytes {first}-{last}/{size}"
+                )
+
+    def test_ranges_sent_with_sendfile(self):
+        self.httpd.file_cache = None
+        response, body = self.get_range("bytes=1000-1999")
+        self.assertEqual((response.status, body), (206, self.data[1000:2000]))
+
+    def test_unsatisfiable(self):
+        for value in ("bytes=2048-", "bytes=5000-6000", "bytes=-0"):
+            with self.subTest(value):
+                response, body = self.get_range(value)
+                self.assertEqual((response.status, body), (416, b""))
+                self.assertEqual(response.getheader("Content-Range"), "bytes */2048")
+
+    def test_suffix_range_of_empty_file(self):
+        self.write("empty.bin", b"")
+        response, body = self.get("/empty.bin", headers={"Range": "bytes=-5"})
+        self.assertEqual((response.status, body), (416, b""))
+        self.assertEqual(response.getheader("Content-Range"), "bytes */0")
+
+    def test_whole_file_for_unsupported_ranges(self):
+        for value in (
+            "bytes=0-1,5-6",
+            "bytes=9-3",
+            "bytes=a-b",
+            "items=0-1",
+            "bytes=--5",
+            "bytes=+1-5",
+            "bytes=-",
+            "bytes=1_0-20",
+        ):
+            with self.subTest(value):
+                response, body = self.get_range(value)
+                self.assertEqual((response.status, body), (200, self.data))
+
+    def test_if_range(self):
+        response, _ = self.get("/data.bin")
+        etag = response.getheader("ETag")
+        last_modified = response.getheader("Last-Modified")
+        for validator in (etag, last_modified):
+            response, body = self.get_range("bytes=0-3", **{"If-Range": validator})
+            self.assertEqual((response.status, body), (206, self.data[:4]))
+        response, body = self.get_range("bytes=0-3", **{"If-Range": '"stale"'})
+        self.assertEqual((response.status, body), (200, self.data))
+
+
+class TestEncodings(ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mtime = 1_000_000_000
+        self.write("index.html", PAGE, mtime=self.mtime)
+        self.write("index.html.gz", gzip.compress(PAGE), mtime=self.mtime)
+        self.write("index.html.xz", b"xz", mtime=self.mtime)
+
+    def test_accepted_encodings(self):
+        handler = QuietHandler.__new__(QuietHandler)
+        for header, expected in (
+            ("", set()),
+            ("gzip, br", {"gzip", "br"}),
+            ("GZIP;q=0.5, xz;q=0", {"gzip"}),
+            ("gzip;q=0.0, xz;q=bad", set()),
+            ("*", {"gzip"}),
+        ):
+            with self.subTest(header):
+                handler.headers = {"Accept-Encoding": header}
+                self.assertEqual(handler._accepted_encodings(), expected)
+
+    def test_smallest_accepted_sibling(self):
+        response, body = self.get(headers={"Accept-Encoding": "gzip, xz"})
+        self.assertEqual((response.getheader("Content-Encoding"), body), ("xz", b"xz"))
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        response, body = self.get(headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(body), PAGE)
+
+    def test_identity_still_varies(self):
+        response, body = self.get(headers={"Accept-Encoding": "gzip;q=0"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(body, PAGE)
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+
+    def test_stale_sibling_is_ignored(self):
+        self.write("index.html.xz", b"xz", mtime=self.mtime - 10)
+        response, _ = self.get(headers={"Accept-Encoding": "xz"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+
+    def test_not_modified_varies(self):
+        headers = {"Accept-Encoding": "gzip"}
+        response, _ = self.get(headers=headers)
+        headers["If-None-Match"] = response.getheader("ETag")
+        response, _ = self.get(headers=headers)
+        self.assertEqual(response.status, 304)
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+
+    def test_plain_file_does_not_vary(self):
+        self.write("plain.html", PAGE)
+        response, _ = self.get("/plain.html", headers={"Accept-Encoding": "gzip"})
+        self.assertIsNone(response.getheader("Vary"))
+
+
+if __name__ == "__main__":
+    unittest.main()
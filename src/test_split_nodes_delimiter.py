@@ -1,7 +1,8 @@
 import unittest
 
+from fixtures import assert_linear
 from htmlnode import HTMLNode
-from markdown_operations import split_nodes_delimiter
+from markdown_operations import MarkdownFormattingError, split_nodes_delimiter
 from textnode import TextNode, TextNodeType
 
 
@@ -70,5 +71,31 @@ class TestSplitNodesDelimiter(unittest.TestCase):
         ]
         self.assertEqual(split_nodes_delimiter(nodes, "**", "bold"), expected)
 
+    def test_repeated_identical_segments(self):
+        # The same text inside and after a delimiter, which list.index
+        # labelled by its first occurrence
+        node = TextNode("*x*x", TextNodeType.TEXT)
+        expected = [
+            TextNode("x", TextNodeType.ITALIC),
+            TextNode("x", TextNodeType.TEXT),
+        ]
+        self.assertEqual(split_nodes_delimiter([node], "*", "italic"), expected)
+
+    def test_unclosed_delimiter_position(self):
+        node = TextNode("`one` and `two` and `three", TextNodeType.TEXT)
+        with self.assertRaises(MarkdownFormattingError) as context:
+            split_nodes_delimiter([node], "`", "code")
+        self.assertEqual(context.exception.position, 20)
+
+    def test_linear_in_number_of_segments(self):
+        def split(node):
+            split_nodes_delimiter([node], "`", "code")
+
+        def spans(count):
+            text = " ".join(f"`span{i}`" for i in range(count))
+            return TextNode(text, TextNodeType.TEXT)
+
+        assert_linear(self, split, spans, 2_000)
+
 if __name__ == "__main__":
     unittest.main()
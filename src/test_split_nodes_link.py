@@ -72,5 +72,19 @@ class TestSplitNodesLink(unittest.TestCase):
         ]
         self.assertEqual(split_nodes_link(nodes), expected)
 
+    def test_links_mixed_with_images(self):
+        node = TextNode(
+            "![a](/a.png) then [b](/b) then ![c](/c.png) and [d](/d)!",
+            TextNodeType.TEXT,
+        )
+        expected = [
+            TextNode("![a](/a.png) then ", TextNodeType.TEXT),
+            TextNode("b", TextNodeType.LINK, "/b"),
+            TextNode(" then ![c](/c.png) and ", TextNodeType.TEXT),
+            TextNode("d", TextNodeType.LINK, "/d"),
+            TextNode("!", TextNodeType.TEXT),
+        ]
+        self.assertEqual(split_nodes_link([node]), expected)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,80 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from build_manifest import BuildManifest
+from fixtures import TempDirTestCase
+from static_sync import sync_directory, sync_file
+
+
+class TestStaticSync(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.write("static/index.css", "body { color: red; }")
+        self.write("static/images/logo.png", "png bytes")
+
+    def _sync(self, **kwargs):
+        with redirect_stdout(StringIO()):
+            return sync_directory(self.static, self.public, self.manifest, **kwargs)
+
+    def test_copies_every_file_on_first_sync(self):
+        copied = self._sync(jobs=2)
+        self.assertEqual(len(copied), 2)
+        self.assertEqual(self.read("public/index.css"), "body { color: red; }")
+        self.assertEqual(self.read("public/images/logo.png"), "png bytes")
+
+    def test_copies_only_changed_files(self):
+        self._sync()
+        self.write("static/index.css", "body { color: blue; }")
+        copied = self._sync()
+        self.assertEqual(copied, [os.path.join(self.public, "index.css")])
+        self.assertEqual(self.read("public/index.css"), "body { color: blue; }")
+
+    def test_removed_file_is_stale(self):
+        self._sync()
+        os.remove(os.path.join(self.static, "index.css"))
+        self.manifest.save()
+        self.manifest = BuildManifest.load(self.manifest.path)
+        self._sync()
+        with redirect_stdout(StringIO()):
+            self.manifest.remove_stale_outputs()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "images/logo.png")))
+
+    def test_sync_file_keeps_mtime(self):
+        source = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.public, "index.css")
+        sync_file(source, dest)
+        self.assertEqual(os.stat(source).st_mtime_ns, os.stat(dest).st_mtime_ns)
+
+    def test_sync_file_hard_links(self):
+        source = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.public, "index.css")
+        sync_file(source, dest, link=True)
+        self.assertTrue(os.path.samefile(source, dest))
+
+    def test_sync_file_leaves_tmp_named_neighbours_alone(self):
+        self.write("static/notes.txt.tmp", "draft")
+        self.write("static/notes.txt", "final")
+        for name in ("notes.txt.tmp", "notes.txt"):
+            sync_file(os.path.join(self.static, name), os.path.join(self.public, name))
+        self.assertEqual(self.read("public/notes.txt.tmp"), "draft")
+        self.assertEqual(self.read("public/notes.txt"), "final")
+
+    def test_sync_file_removes_temp_file_on_error(self):
+        source = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.public, "index.css")
+        for link in (False, True):
+            with mock.patch("os.replace", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    sync_file(source, dest, link=link)
+            self.assertEqual(os.listdir(self.public), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import io
+import os
+import tempfile
+import unittest
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from template import Template, TemplateSegment, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compiles_segments(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        expected = [
+            TemplateSegment("<title>"),
+            TemplateSegment("Title", slot=True),
+            TemplateSegment("</title>"),
+            TemplateSegment("Content", slot=True),
+        ]
+        self.assertEqual(template.segments, expected)
+
+    def test_render_to_fills_every_slot(self):
+        template = Template("{{ Title }} | {{ Title }}: {{ Content }}")
+        output = io.StringIO()
+        template.render_to(output, {"Title": "Home", "Content": "<p>Hi</p>"})
+        self.assertEqual(output.getvalue(), "Home | Home: <p>Hi</p>")
+
+    def test_render_to_streams_node(self):
+        template = Template("<article>{{ Content }}</article>")
+        node = ParentNode([LeafNode("Hi", "p")], "div")
+        output = io.StringIO()
+        template.render_to(output, {"Content": node})
+        self.assertEqual(output.getvalue(), "<article><div><p>Hi</p></div></article>")
+
+    def test_unknown_slot_is_kept(self):
+        template = Template("{{ Title }} {{ Footer }}")
+        self.assertEqual(template.render({"Title": "Home"}), "Home {{ Footer }}")
+
+    def test_load_template_is_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Content }}")
+            self.assertIs(load_template(path), load_template(path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,50 @@
+import random
 import unittest
 
-from markdown_operations import text_to_textnodes
+from markdown_operations import (
+    MarkdownFormattingError,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
 from textnode import TextNode, TextNodeType
 
+WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur"]
+
+
+def random_inline_text(rng):
+    """Return inline text of plain words, bold, italic, code, images and
+    links, none of them nested, separated by spaces."""
+
+    parts = []
+    for _ in range(rng.randrange(1, 12)):
+        words = " ".join(rng.choices(WORDS, k=rng.randrange(1, 4)))
+        parts.append(
+            rng.choice(
+                [
+                    words,
+                    f"**{words}**",
+                    f"*{words}*",
+                    f"`{words}`",
+                    f"![{words}](/{rng.choice(WORDS)}.png)",
+                    f"[{words}](/{rng.choice(WORDS)})",
+                ]
+            )
+        )
+    return " ".join(parts)
+
+
+def split_pipeline(text):
+    """The five splitting passes that text_to_textnodes replaced."""
+
+    nodes = [TextNode(text, TextNodeType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextNodeType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextNodeType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextNodeType.CODE)
+    nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
 class TestTextToTextNodes(unittest.TestCase):
     def test_all_cases(self):
         text = "This is **text** with an *italic* word and a `code block` and an ![image](https://storage.googleapis.com/qvault-webapp-dynamic-assets/course_assets/zjjcJKZ.png) and a [link](https://boot.dev)"
@@ -25,5 +67,94 @@ class TestTextToTextNodes(unittest.TestCase):
         expected = [TextNode("This is just normal text. This should only return one TextNode object.", TextNodeType.TEXT)]
         self.assertEqual(text_to_textnodes(text), expected)
 
+    def test_code_keeps_other_markers(self):
+        text = "Multiply with `a * b` here"
+        expected = [
+            TextNode("Multiply with ", TextNodeType.TEXT),
+            TextNode("a * b", TextNodeType.CODE),
+            TextNode(" here", TextNodeType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_bold_inside_link(self):
+        text = "See [the **docs**](https://boot.dev) now"
+        expected = [
+            TextNode("See ", TextNodeType.TEXT),
+            TextNode(
+                "the docs",
+                TextNodeType.LINK,
+                "https://boot.dev",
+                [
+                    TextNode("the ", TextNodeType.TEXT),
+                    TextNode("docs", TextNodeType.BOLD),
+                ],
+            ),
+            TextNode(" now", TextNodeType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_unmatched_bracket_is_text(self):
+        text = "An [unfinished link and a [real](https://boot.dev)"
+        expected = [
+            TextNode("An ", TextNodeType.TEXT),
+            TextNode("unfinished link and a [real", TextNodeType.LINK, "https://boot.dev"),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_link_inside_bold(self):
+        text = "Get **[Download](/dl)** here"
+        expected = [
+            TextNode("Get ", TextNodeType.TEXT),
+            TextNode(
+                "Download",
+                TextNodeType.BOLD,
+                children=[TextNode("Download", TextNodeType.LINK, "/dl")],
+            ),
+            TextNode(" here", TextNodeType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_link_inside_italic(self):
+        text = "*see [docs](/d)*"
+        expected = [
+            TextNode(
+                "see docs",
+                TextNodeType.ITALIC,
+                children=[
+                    TextNode("see ", TextNodeType.TEXT),
+                    TextNode("docs", TextNodeType.LINK, "/d"),
+                ],
+            ),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_code_span_crossing_link_wins(self):
+        text = "see [x `](y)` z"
+        expected = [
+            TextNode("see [x ", TextNodeType.TEXT),
+            TextNode("](y)", TextNodeType.CODE),
+            TextNode(" z", TextNodeType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_link_inside_code_is_text(self):
+        text = "x `[a](b)` y"
+        expected = [
+            TextNode("x ", TextNodeType.TEXT),
+            TextNode("[a](b)", TextNodeType.CODE),
+            TextNode(" y", TextNodeType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_matches_split_pipeline(self):
+        rng = random.Random(5)
+        for _ in range(2000):
+            text = random_inline_text(rng)
+            self.assertEqual(text_to_textnodes(text), split_pipeline(text), text)
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(MarkdownFormattingError):
+            text_to_textnodes("This is **not closed")
+
 if __name__ == "__main__":
     unittest.main()
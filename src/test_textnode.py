@@ -2,6 +2,7 @@ import unittest
 
 from leafnode import LeafNode
 from markdown_operations import text_node_to_html_node
+from parentnode import ParentNode
 from textnode import TextNode, TextNodeType
 
 
@@ -53,6 +54,18 @@ class TestTextModeToHtmlNode(unittest.TestCase):
         expected = LeafNode("Click this link!", "a", {"href": "https://google.com"})
         self.assertEqual(text_node_to_html_node(node), expected)
 
+    def test_link_with_children_conversion(self):
+        node = TextNode(
+            "the docs",
+            TextNodeType.LINK,
+            "https://boot.dev",
+            [TextNode("the ", TextNodeType.TEXT), TextNode("docs", TextNodeType.BOLD)],
+        )
+        expected = ParentNode(
+            [LeafNode("the "), LeafNode("docs", "b")], "a", {"href": "https://boot.dev"}
+        )
+        self.assertEqual(text_node_to_html_node(node), expected)
+
 
 if __name__ == "__main__":
     unittest.main()
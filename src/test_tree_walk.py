@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+from fixtures import TempDirTestCase
+from tree_walk import walk_tree
+
+
+class TestWalkTree(TempDirTestCase):
+    def _touch(self, *parts):
+        self.write(os.path.join(*parts), "")
+
+    def test_yields_every_directory_and_file(self):
+        self._touch("index.md")
+        self._touch("blog", "post.md")
+        self._touch("blog", "2024", "old.md")
+        walked = {
+            relative_dir: sorted(entry.name for entry in files)
+            for relative_dir, _, files in walk_tree(self.tmp.name)
+        }
+        self.assertEqual(
+            walked,
+            {
+                "": ["index.md"],
+                "blog": ["post.md"],
+                os.path.join("blog", "2024"): ["old.md"],
+            },
+        )
+
+    def test_parents_come_first(self):
+        self._touch("a", "b", "c", "page.md")
+        order = [relative_dir for relative_dir, _, _ in walk_tree(self.tmp.name)]
+        self.assertEqual(
+            order,
+            ["", "a", os.path.join("a", "b"), os.path.join("a", "b", "c")],
+        )
+
+    def test_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        # os.makedirs and shutil.rmtree recurse themselves, so the tree is
+        # built and removed one directory at a time
+        paths = [self.tmp.name]
+        for _ in range(depth):
+            paths.append(os.path.join(paths[-1], "d"))
+            os.mkdir(paths[-1])
+        self.addCleanup(lambda: [os.rmdir(path) for path in reversed(paths[1:])])
+        self.assertEqual(sum(1 for _ in walk_tree(self.tmp.name)), depth + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+import enum
+import gzip
+import os
+import types
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from block_cache import BlockCache
+from build_manifest import BuildManifest
+from fixtures import TempDirTestCase
+from page_budget import PageBudget
+import watcher
+from watcher import InotifyWatcher, PollingWatcher, SiteRebuilder
+
+
+class TestWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.tmp.name
+        self.content = self._path("content")
+        self.static = self._path("static")
+        self.template = self._path("template.html")
+        self.public = self._path("public")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/index.md", "# Blog")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", "{{ Title }}|{{ Content }}")
+        os.mkdir(self.public)
+        self.rebuilder = self._rebuilder()
+        self.rebuilder.rebuild_all_pages()
+
+    def _rebuilder(self, **options):
+        return SiteRebuilder(
+            self.content,
+            self.static,
+            self.template,
+            self.public,
+            BuildManifest(self._path("manifest.json")),
+            batch_size=1,
+            **options,
+        )
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def test_polling_watcher_reports_changes(self):
+        watcher = PollingWatcher([self.content, self.template])
+        self.assertEqual(watcher.poll(), set())
+        added = self.write("content/new.md", "# New")
+        os.remove(self._path("content/index.md"))
+        self.assertEqual(watcher.poll(), {added, self._path("content/index.md")})
+
+    def test_rebuild_all_pages(self):
+        self.assertEqual(self.read("public/blog/index.html"), "Blog|<div><h1>Blog</h1></div>")
+
+    def test_page_change_rebuilds_only_that_page(self):
+        changed = self.write("content/index.md", "# Welcome")
+        before = os.stat(self._path("public/blog/index.html")).st_mtime_ns
+        self.rebuilder.apply({changed})
+        self.assertEqual(self.read("public/index.html"), "Welcome|<div><h1>Welcome</h1></div>")
+        self.assertEqual(os.stat(self._path("public/blog/index.html")).st_mtime_ns, before)
+
+    def test_source_written_during_rebuild_is_rebuilt(self):
+        source = self.write("content/index.md", "# One")
+        generate_page = watcher.generate_page
+
+        def edited_while_generating(*args):
+            page = generate_page(*args)
+            self.write("content/index.md", "# Two", mtime=1_000_000_000)
+            return page
+
+        with mock.patch.object(watcher, "generate_page", edited_while_generating):
+            self.rebuilder.apply({source})
+        self.assertEqual(self.read("public/index.html"), "One|<div><h1>One</h1></div>")
+        self.rebuilder.apply({source})
+        self.assertEqual(self.read("public/index.html"), "Two|<div><h1>Two</h1></div>")
+
+    def test_removed_page_is_deleted(self):
+        removed = self._path("content/blog/index.md")
+        os.remove(removed)
+        self.rebuilder.apply({removed})
+        self.assertFalse(os.path.exists(self._path("public/blog/index.html")))
+
+    def test_asset_change_is_copied(self):
+        changed = self.write("static/images/logo.svg", "<svg/>")
+        self.rebuilder.apply({changed})
+        self.assertEqual(self.read("public/images/logo.svg"), "<svg/>")
+
+    def test_template_change_rebuilds_everything(self):
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.rebuilder.apply({self.template})
+        self.assertEqual(self.read("public/index.html"), "<main><div><h1>Home</h1></div></main>")
+        self.assertEqual(self.read("public/blog/index.html"), "<main><div><h1>Blog</h1></div></main>")
+
+    def test_block_cache_is_used(self):
+        block_cache = BlockCache()
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self._rebuilder(block_cache=block_cache).apply({self.template})
+        self.assertEqual(block_cache.misses, 2)
+        self.assertEqual(self.read("public/index.html"), "<main><div><h1>Home</h1></div></main>")
+
+    def test_page_over_budget_is_not_recorded(self):
+        rebuilder = self._rebuilder(budget=PageBudget(seconds=0.001))
+        slow = self.write("content/slow.md", "# Slow\n\n" + "Some *text*.\n\n" * 20_000)
+        fast = self.write("content/fast.md", "# Fast")
+        rebuilder.apply({slow, fast})
+        self.assertNotIn(self._path("public/slow.html"), rebuilder.manifest.outputs)
+        self.assertIn(self._path("public/fast.html"), rebuilder.manifest.outputs)
+
+    def test_link_static(self):
+        rebuilder = self._rebuilder(link_static=True)
+        changed = self.write("static/app.js", "run()")
+        rebuilder.apply({changed})
+        self.assertTrue(os.path.samefile(changed, self._path("public/app.js")))
+
+    def test_precompressed_siblings_follow_outputs(self):
+        rebuilder = self._rebuilder(precompress=(".gz",))
+        page = self.write("content/index.md", "# Home\n\n" + "Some text. " * 50)
+        rebuilder.apply({page})
+        with gzip.open(self._path("public/index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), self.read("public/index.html"))
+        os.remove(page)
+        rebuilder.apply({page})
+        self.assertFalse(os.path.exists(self._path("public/index.html.gz")))
+
+    def test_compressed_assets_are_not_taken_for_siblings(self):
+        rebuilder = self._rebuilder(precompress=(".gz",))
+        archive = self.write("static/dl/archive.tar.gz", gzip.compress(b"tar" * 100))
+        script = self.write("static/app.js", "run(); " * 100)
+        shipped = self.write("static/app.js.gz", "shipped with the site")
+        rebuilder.apply({archive, shipped, script})
+        self.assertTrue(os.path.exists(self._path("public/dl/archive.tar.gz")))
+        self.assertEqual(self.read("public/app.js.gz"), "shipped with the site")
+        os.remove(script)
+        rebuilder.apply({script})
+        self.assertEqual(self.read("public/app.js.gz"), "shipped with the site")
+
+
+class FakeFlags(enum.IntFlag):
+    CREATE = 1
+    CLOSE_WRITE = 2
+    DELETE = 4
+    MOVED_FROM = 8
+    MOVED_TO = 16
+    ATTRIB = 32
+    ISDIR = 64
+
+
+Event = namedtuple("Event", "wd mask cookie name")
+
+
+class FakeINotify:
+    """Stands in for inotify_simple.INotify, returning queued events."""
+
+    def __init__(self):
+        self.watches = {}
+        self.events = []
+
+    def add_watch(self, path, mask):
+        wd = len(self.watches) + 1
+        self.watches[wd] = path
+        return wd
+
+    def read(self, timeout=None):
+        events, self.events = self.events, []
+        return events
+
+    def queue(self, directory, name, mask=FakeFlags.CLOSE_WRITE):
+        wd = next(wd for wd, path in self.watches.items() if path == directory)
+        self.events.append(Event(wd, mask, 0, name))
+
+
+class TestInotifyWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        inotify = types.SimpleNamespace(flags=FakeFlags, INotify=FakeINotify)
+        patcher = mock.patch.object(watcher, "inotify_simple", inotify)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.write("content/index.md", "# Home")
+        self.write("template.html", "{{ Content }}")
+        # The build watches the default relative paths
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_reports_relative_roots(self):
+        inotify_watcher = InotifyWatcher(["content", "template.html"])
+        inotify = inotify_watcher._inotify
+        inotify.queue(".", "template.html")
+        inotify.queue(".", "notes.txt")
+        inotify.queue("content", "index.md")
+        self.assertEqual(
+            inotify_watcher.wait(),
+            {"template.html", os.path.join("content", "index.md")},
+        )
+
+    def test_new_directory_reports_its_files(self):
+        inotify_watcher = InotifyWatcher(["content"])
+        self.write("content/blog/post.md", "# Post")
+        inotify_watcher._inotify.queue(
+            "content", "blog", FakeFlags.CREATE | FakeFlags.ISDIR
+        )
+        self.assertEqual(
+            inotify_watcher.wait(), {os.path.join("content", "blog", "post.md")}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 class TextNodeType(Enum):
@@ -14,10 +14,21 @@ class TextNodeType(Enum):
 class TextNode:
     """An object that represents different types of inline text"""
 
-    def __init__(self, text: str, text_type: TextNodeType, url: Optional[str] = None) -> None:
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(
+        self,
+        text: str,
+        text_type: TextNodeType,
+        url: Optional[str] = None,
+        children: Optional[List["TextNode"]] = None,
+    ) -> None:
         self.text = text
         self.text_type = text_type
         self.url = url
+        # Inline markup nested inside a bold, italic or link token, e.g.
+        # [**bold**](url) or **[link](url)**
+        self.children = children
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, TextNode):
@@ -26,7 +37,10 @@ class TextNode:
             self.text == other.text
             and self.text_type == other.text_type
             and self.url == other.url
+            and self.children == other.children
         )
 
     def __repr__(self) -> str:
+        if self.children is not None:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, {self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
@@ -0,0 +1,28 @@
+import os
+from typing import Iterator, List, Tuple
+
+
+def walk_tree(root: str) -> Iterator[Tuple[str, str, List[os.DirEntry]]]:
+    """Yield (relative_dir, directory, files) for root and every
+    directory below it, parents before their children.
+
+    relative_dir is the directory's path relative to root ("" for root
+    itself) and files holds the os.DirEntry of each file in it. The walk
+    is iterative, so deep trees can't hit the recursion limit, and uses
+    the file type scandir already read instead of stat-ing each entry."""
+
+    stack = [("", root)]
+    while stack:
+        relative_dir, directory = stack.pop()
+        files: List[os.DirEntry] = []
+        subdirectories = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    subdirectories.append(
+                        (os.path.join(relative_dir, entry.name), entry.path)
+                    )
+                else:
+                    files.append(entry)
+        yield relative_dir, directory, files
+        stack.extend(reversed(subdirectories))
@@ -0,0 +1,319 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from block_cache import BlockCache
+from build_manifest import BuildManifest
+from page_budget import PageBudget, PageBudgetExceeded
+from page_generator import GeneratedPage, find_pages, generate_page, page_destination
+from parse_cache import ParseCache
+from precompress import refresh_siblings
+from static_sync import sync_file
+
+try:
+    import inotify_simple
+except ImportError:  # Optional; changes are found by polling without it
+    inotify_simple = None
+
+# Maps each file to its (mtime_ns, size)
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def snapshot(roots: Iterable[str]) -> Snapshot:
+    """Stat every file under roots, which may be files or directories."""
+
+    result: Snapshot = {}
+    stack: List[str] = []
+    for root in roots:
+        if os.path.isdir(root):
+            stack.append(root)
+        elif os.path.isfile(root):
+            stat = os.stat(root)
+            result[root] = (stat.st_mtime_ns, stat.st_size)
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    stat = entry.stat()
+                    result[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return result
+
+
+class PollingWatcher:
+    """Finds changed files by comparing snapshots of the watched roots."""
+
+    def __init__(self, roots: Iterable[str], interval: float = 0.05) -> None:
+        self.roots = list(roots)
+        self.interval = interval
+        self._snapshot = snapshot(self.roots)
+
+    def poll(self) -> Set[str]:
+        """Return the files added, modified or removed since the last
+        poll."""
+
+        current = snapshot(self.roots)
+        changed = {
+            path
+            for path in current.keys() | self._snapshot.keys()
+            if current.get(path) != self._snapshot.get(path)
+        }
+        self._snapshot = current
+        return changed
+
+    def wait(self) -> Set[str]:
+        """Block until at least one file changes and return the changes."""
+
+        while True:
+            time.sleep(self.interval)
+            changed = self.poll()
+            if changed:
+                return changed
+
+
+class InotifyWatcher:
+    """Finds changed files from inotify events, without rescanning the
+    watched trees. Needs the optional inotify_simple package."""
+
+    def __init__(self, roots: Iterable[str], interval: float = 0.05) -> None:
+        flags = inotify_simple.flags
+        self._mask = (
+            flags.CREATE
+            | flags.CLOSE_WRITE
+            | flags.DELETE
+            | flags.MOVED_FROM
+            | flags.MOVED_TO
+            | flags.ATTRIB
+        )
+        self.roots = [os.path.normpath(root) for root in roots]
+        self.interval = interval
+        self._inotify = inotify_simple.INotify()
+        self._watches: Dict[int, str] = {}
+        for root in self.roots:
+            if os.path.isdir(root):
+                self._watch_tree(root)
+            else:
+                # Files are watched through their directory
+                self._watch(os.path.dirname(root) or ".")
+
+    def _watch(self, directory: str) -> None:
+        self._watches[self._inotify.add_watch(directory, self._mask)] = directory
+
+    def _watch_tree(self, directory: str) -> List[str]:
+        """Watch directory and everything below it, returning the files
+        already inside it."""
+
+        files: List[str] = []
+        for path, _, names in os.walk(directory):
+            self._watch(path)
+            files.extend(os.path.join(path, name) for name in names)
+        return files
+
+    def _is_watched(self, path: str) -> bool:
+        return any(
+            path == root or path.startswith(root + os.sep) for root in self.roots
+        )
+
+    def wait(self) -> Set[str]:
+        """Block until at least one file changes and return the changes.
+        Events arriving within interval of each other are batched."""
+
+        flags = inotify_simple.flags
+        changed: Set[str] = set()
+        events = self._inotify.read()
+        while events:
+            for event in events:
+                directory = self._watches.get(event.wd)
+                if directory is None or not event.name:
+                    continue
+                path = os.path.normpath(os.path.join(directory, event.name))
+                if not self._is_watched(path):
+                    continue
+                if event.mask & flags.ISDIR:
+                    if event.mask & (flags.CREATE | flags.MOVED_TO):
+                        changed.update(self._watch_tree(path))
+                    continue
+                changed.add(path)
+            events = self._inotify.read(timeout=int(self.interval * 1000))
+        return changed
+
+
+def make_watcher(roots: Iterable[str], interval: float = 0.05):
+    """Return an inotify watcher when inotify_simple is installed, and a
+    polling watcher otherwise."""
+
+    if inotify_simple is not None:
+        return InotifyWatcher(roots, interval)
+    return PollingWatcher(roots, interval)
+
+
+class SiteRebuilder:
+    """Applies file changes to the generated site, rebuilding only the
+    page or asset that each change affects.
+
+    cache, block_cache, budget and link_static are used as by a full
+    build. precompress lists the suffixes of the compressed siblings kept
+    next to each output, and is empty if the build doesn't precompress.
+    A page over its budget is reported and left out of the manifest, so
+    it is tried again on its next change."""
+
+    def __init__(
+        self,
+        content_dir: str,
+        static_dir: str,
+        template_path: str,
+        dest_dir: str,
+        manifest: BuildManifest,
+        jobs: int = 1,
+        batch_size: int = 200,
+        cache: Optional[ParseCache] = None,
+        block_cache: Optional[BlockCache] = None,
+        budget: Optional[PageBudget] = None,
+        link_static: bool = False,
+        precompress: Sequence[str] = (),
+    ) -> None:
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.dest_dir = dest_dir
+        self.manifest = manifest
+        self.jobs = jobs
+        self.batch_size = batch_size
+        self.cache = cache
+        self.block_cache = block_cache
+        self.budget = budget
+        self.link_static = link_static
+        self.precompress = precompress
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def apply(self, changed: Iterable[str]) -> None:
+        """Rebuild whatever the changed paths affect and save the
+        manifest. A template change rebuilds every page."""
+
+        changed = {os.path.normpath(path) for path in changed}
+        if self.template_path in changed:
+            self.rebuild_all_pages()
+        for path in sorted(changed):
+            relative = self._relative_to(path, self.static_dir)
+            if relative is not None:
+                self._sync_asset(path, os.path.join(self.dest_dir, relative))
+                continue
+            relative = self._relative_to(path, self.content_dir)
+            if relative is not None:
+                self._sync_page(path, page_destination(self.dest_dir, relative))
+        self.manifest.save()
+
+    def rebuild_all_pages(self) -> None:
+        """Regenerate every page in batches of batch_size, saving the
+        manifest after each batch so an interrupted rebuild resumes."""
+
+        self.manifest.use_template(self.template_path)
+        pages = list(find_pages(self.content_dir, self.dest_dir, self.manifest))
+        for start in range(0, len(pages), self.batch_size):
+            batch = pages[start : start + self.batch_size]
+            if self.jobs > 1:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+                results = [
+                    self._executor.submit(generate_page, *self._page_args(*page)).result
+                    for page in batch
+                ]
+            else:
+                results = [
+                    partial(generate_page, *self._page_args(*page)) for page in batch
+                ]
+            for (from_path, dest_path), result in zip(batch, results):
+                self._page_done(from_path, dest_path, result)
+            self.manifest.save()
+            print(f"Rebuilt {start + len(batch)}/{len(pages)} pages")
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _page_args(self, source_path: str, dest_path: str) -> Tuple:
+        return (
+            source_path,
+            self.template_path,
+            dest_path,
+            False,
+            self.cache,
+            self.block_cache,
+            self.budget,
+        )
+
+    def _page_done(
+        self, source_path: str, dest_path: str, result: Callable[[], GeneratedPage]
+    ) -> None:
+        """Record the page that result returns, unless it went over
+        budget."""
+
+        try:
+            page = result()
+        except PageBudgetExceeded as e:
+            print(f"Page over budget: {e}")
+            return
+        self.manifest.record(
+            source_path, dest_path, output_hash=page.output_hash, source=page.source
+        )
+        self._refresh_siblings(dest_path)
+
+    def _sync_page(self, source_path: str, dest_path: str) -> None:
+        if not os.path.exists(source_path):
+            self._remove_output(dest_path)
+        elif self.manifest.needs_build(source_path, dest_path):
+            self._page_done(
+                source_path,
+                dest_path,
+                partial(generate_page, *self._page_args(source_path, dest_path)),
+            )
+
+    def _sync_asset(self, source_path: str, dest_path: str) -> None:
+        if not os.path.exists(source_path):
+            self._remove_output(dest_path)
+        elif self.manifest.needs_build(source_path, dest_path, "asset"):
+            print(f"Copying file '{source_path}, to '{dest_path}'")
+            sync_file(source_path, dest_path, self.link_static)
+            self.manifest.record(source_path, dest_path, "asset")
+            self._refresh_siblings(dest_path)
+
+    def _remove_output(self, dest_path: str) -> None:
+        self.manifest.remove_output(dest_path)
+        self._refresh_siblings(dest_path)
+
+    def _refresh_siblings(self, dest_path: str) -> None:
+        if self.precompress:
+            refresh_siblings(dest_path, self.precompress, self.manifest.outputs)
+
+    @staticmethod
+    def _relative_to(path: str, directory: str) -> Optional[str]:
+        if path.startswith(directory + os.sep):
+            return path[len(directory) + 1 :]
+        return None
+
+
+def watch(rebuilder: SiteRebuilder, interval: float = 0.05) -> None:
+    """Rebuild the site as its sources change, until interrupted."""
+
+    watcher = make_watcher(
+        (rebuilder.content_dir, rebuilder.static_dir, rebuilder.template_path),
+        interval,
+    )
+    print(f"Watching for changes with {type(watcher).__name__}...")
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            try:
+                rebuilder.apply(changed)
+            except Exception as e:  # Keep watching; the next save may fix it
+                print(f"Rebuild failed: {e}")
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Rebuilt {len(changed)} changed file(s) in {elapsed:.1f} ms")
+    finally:
+        rebuilder.close()